@@ -2,16 +2,31 @@
 const { Sequelize } = require('sequelize');
 
 // Database connection configuration
-const sequelize = new Sequelize(
-    'momisdb',  // Database name
-    'root',     // Database username
-    '13831383', // Database password
-    {
-        host: 'localhost',    // Database host
-        dialect: 'mysql',     // Specify MySQL as the dialect
-        logging: false,       // Disable logging of SQL queries (or set to console.log to see them)
-    }
-);
+// DB_DIALECT=sqlite uses a local SQLite file (or memory) as a stand-in for MySQL
+const dialect = process.env.DB_DIALECT || 'mysql';
+
+const sequelize = dialect === 'sqlite'
+    ? new Sequelize({
+        dialect: 'sqlite',
+        storage: process.env.DB_STORAGE || ':memory:', // SQLite file path
+        logging: false,
+    })
+    : new Sequelize(
+        process.env.DB_NAME || 'momisdb',         // Database name
+        process.env.DB_USER || 'root',            // Database username
+        process.env.DB_PASSWORD || '13831383',    // Database password
+        {
+            host: process.env.DB_HOST || 'localhost', // Database host
+            dialect: dialect,     // Specify MySQL as the dialect
+            logging: false,       // Disable logging of SQL queries (or set to console.log to see them)
+            pool: {
+                max: parseInt(process.env.DB_POOL_MAX) || 10, // Shared by the score writer flushes
+                min: 0,
+                acquire: 30000,
+                idle: 10000,
+            },
+        }
+    );
 
 // Test the database connection
 sequelize.authenticate()
@@ -23,4 +38,4 @@ sequelize.authenticate()
     });
 
 // Export the sequelize instance for use in other parts of the application
-module.exports = sequelize;
\ No newline at end of file
+module.exports = sequelize;
@@ -1,5 +1,6 @@
 // Import sequelize instance and models from the central db object
 const { sequelize, User, Score, Reward } = require('./models'); // Path to models/index.js
+const ScoreWriter = require('../score_writer'); // Write-behind queue used by Server.js
 
 // --- User Functions ---
 async function createUser({ telegramId, username, firstName, lastName }) {
@@ -91,6 +92,124 @@ async function getUserScores(userTelegramId) {
   }
 }
 
+// --- Score Writer Functions ---
+async function testScoreWriter() {
+  // Small batches so the run exercises several size-triggered flushes
+  const writer = new ScoreWriter({ User, Score }, { batchSize: 50, flushInterval: 100 });
+  writer.start();
+
+  // Users are upserted: the second enqueue for the same telegramId wins
+  writer.enqueueUser({ telegramId: 555000001, username: "writer_a", firstName: "Writer" });
+  writer.enqueueUser({ telegramId: 555000001, username: "writer_a2", firstName: "Writer" });
+  writer.enqueueUser({ telegramId: 555000002, firstName: "Writer B" });
+
+  for (let i = 0; i < 300; i++) {
+    writer.enqueueScore(i % 2 ? 555000001 : 555000002, i);
+  }
+
+  await writer.drain();
+  console.log('Score writer stats:', writer.stats());
+
+  const userA = await User.findByPk(555000001);
+  const written = await Score.count({ where: { userTelegramId: [555000001, 555000002] } });
+  console.log(`Upserted username: ${userA && userA.username}, scores written: ${written}`);
+
+  if (!userA || userA.username !== "writer_a2" || written !== 300) {
+    throw new Error('Score writer did not persist every queued record');
+  }
+}
+
+// Score model that fails the first `failures` bulkCreate calls, then writes to the real table
+function flakyScore(failures) {
+  const calls = [];
+  return {
+    calls,
+    bulkCreate(rows, options) {
+      calls.push(Date.now());
+      if (calls.length <= failures) {
+        return Promise.reject(new Error('simulated database outage'));
+      }
+      return Score.bulkCreate(rows, options);
+    },
+  };
+}
+
+// Keeps the expected flush errors out of the test output and counts warnings
+function quietLogger() {
+  return { warnings: 0, warn() { this.warnings += 1; }, error() {}, info() {} };
+}
+
+async function countScores(telegramId) {
+  return Score.count({ where: { userTelegramId: telegramId } });
+}
+
+async function testScoreWriterFailures() {
+  const telegramId = 555000001; // created by testScoreWriter
+
+  // A failed flush puts the batch back at the head of the queue
+  let before = await countScores(telegramId);
+  let writer = new ScoreWriter({ User, Score: flakyScore(1) }, { batchSize: 100, logger: quietLogger() });
+  for (let i = 0; i < 20; i++) writer.enqueueScore(telegramId, 1000 + i);
+  await writer.flush();
+  let stats = writer.stats();
+  console.log('After failed flush:', stats);
+  if (stats.failed_flushes !== 1 || stats.queue_depth !== 20 || stats.scores_written !== 0) {
+    throw new Error('Failed flush did not re-queue its batch');
+  }
+  await writer.flush();
+  if (writer.stats().queue_depth !== 0 || (await countScores(telegramId)) - before !== 20) {
+    throw new Error('Re-queued scores were not written on the next flush');
+  }
+
+  // maxQueue: new scores are refused once the queue is full, and a failed batch
+  // that no longer fits behind newer scores is dropped; both count in stats().dropped
+  before = await countScores(telegramId);
+  const logger = quietLogger();
+  writer = new ScoreWriter({ User, Score: flakyScore(1) }, { batchSize: 10, maxQueue: 10, logger });
+  for (let i = 0; i < 10; i++) writer.enqueueScore(telegramId, i); // starts a flush that will fail
+  let refused = 0;
+  for (let i = 0; i < 15; i++) {
+    if (!writer.enqueueScore(telegramId, 100 + i)) refused += 1;
+  }
+  await writer.flush();
+  stats = writer.stats();
+  console.log('After overflow:', stats);
+  if (refused !== 5 || stats.dropped !== 15 || stats.queue_depth !== 10 || logger.warnings !== 1) {
+    throw new Error(`Unexpected drop accounting (refused ${refused}, warnings ${logger.warnings})`);
+  }
+  await writer.drain();
+  if ((await countScores(telegramId)) - before !== 10) {
+    throw new Error('Queued scores were not written after the overflow');
+  }
+
+  // drain retries transient failures with exponential backoff
+  before = await countScores(telegramId);
+  const flaky = flakyScore(3);
+  writer = new ScoreWriter({ User, Score: flaky }, { logger: quietLogger() });
+  for (let i = 0; i < 5; i++) writer.enqueueScore(telegramId, 2000 + i);
+  await writer.drain({ timeout: 5000, minDelay: 50, maxDelay: 1000 });
+  const gaps = flaky.calls.slice(1).map((t, i) => t - flaky.calls[i]);
+  console.log('Drain retry gaps (ms):', gaps);
+  if (flaky.calls.length !== 4 || gaps.some((gap, i) => gap < 50 * 2 ** i - 5)) {
+    throw new Error('Drain did not back off between retries');
+  }
+  if (writer.stats().queue_depth !== 0 || (await countScores(telegramId)) - before !== 5) {
+    throw new Error('Drain did not write the scores after the database recovered');
+  }
+
+  // A database that never comes back: drain gives up at its timeout instead of spinning
+  const down = flakyScore(Infinity);
+  writer = new ScoreWriter({ User, Score: down }, { logger: quietLogger() });
+  for (let i = 0; i < 3; i++) writer.enqueueScore(telegramId, 3000 + i);
+  const started = Date.now();
+  await writer.drain({ timeout: 300, minDelay: 50, maxDelay: 1000 });
+  const elapsed = Date.now() - started;
+  console.log(`Gave up after ${elapsed}ms and ${down.calls.length} attempts`);
+  if (writer.stats().queue_depth !== 3 || elapsed > 1000 || down.calls.length > 6) {
+    throw new Error('Drain did not stop retrying at its timeout');
+  }
+}
+
 // --- Reward Functions (Commented out for now, can be enabled for testing Rewards) ---
 /*
 async function addRewardToUser(userTelegramId, rewardType, rewardValue) {
@@ -201,6 +320,14 @@ async function runTests() {
     }
     console.log("------------------------------------");
 
+    // Test batched persistence through the write-behind queue
+    await testScoreWriter();
+    console.log("------------------------------------");
+
+    // Failed flushes, queue overflow and drain backoff
+    await testScoreWriterFailures();
+    console.log("------------------------------------");
+
     // --- Reward Test Calls (Commented out, enable if needed) ---
     /*
     if (userMammad) {
@@ -224,6 +351,7 @@ async function runTests() {
     // Log detailed error information
     const errorMessage = error.original && error.original.sqlMessage ? error.original.sqlMessage : error.message;
     console.error("An error occurred during the test run:", errorMessage);
+    process.exitCode = 1;
     if (error.original && error.original.sql) {
         console.error("Offending SQL:", error.original.sql);
     }
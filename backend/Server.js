@@ -3,12 +3,31 @@ const express = require("express");
 const cors = require("cors");
 const { v4: uuidv4 } = require("uuid");
 const path = require("path");
+const crypto = require("crypto");
+const { performance, monitorEventLoopDelay } = require("perf_hooks");
 const mathEngine = require("./math_engine.js");
+const TimerWheel = require("./timer_wheel.js");
+const { LeaderboardIndex, loadFromScores } = require("./leaderboard.js");
+const ScoreWriter = require("./score_writer.js");
+const { LRUCache, hashKey, watchMemoryPressure } = require("./auth_cache.js");
+const { Registry } = require("./metrics.js");
 const validateTelegramData = require("./telegramAuth").default;
 const jwt = require("jsonwebtoken");
 
 // تنظیمات پایه
 const app = express();
+
+// زمان هر درخواست به تفکیک route؛ تابع ثابت است و برای هر درخواست closure ساخته نمی‌شود
+function recordRequest() {
+    const route = this.req.route ? this.req.route.path : "other";
+    httpDuration.labels(route).observe((performance.now() - this.metricsStart) / 1000);
+}
+
+app.use((req, res, next) => {
+    res.metricsStart = performance.now();
+    res.on("finish", recordRequest);
+    next();
+});
 app.use(express.urlencoded({ extended: true }));
 app.use(express.json());
 
@@ -37,13 +56,47 @@ const corsOptions = {
 app.options("*", cors(corsOptions));
 app.use(cors(corsOptions));
 
-// بهبود سیستم لاگینگ
-const logger = {
-    info: (message) =>
-        console.log(`[INFO] ${new Date().toISOString()} - ${message}`),
-    error: (message) =>
-        console.error(`[ERROR] ${new Date().toISOString()} - ${message}`),
-};
+// لاگ ساخت‌یافته با نوشتن غیرهمگام (logger.js)
+const logger = require("./logger.js");
+
+// وقتی از cluster_server.js اجرا شده باشیم
+const isClusterWorker = process.env.CLUSTER_WORKER === "true" && !!process.send;
+
+// ذخیره‌سازی دیتابیس اختیاری است؛ نوشتن‌ها از طریق صف write-behind انجام می‌شود
+const db = process.env.USE_DB === "true" ? require("./DataBase/models") : null;
+const scoreWriter = db
+    ? new ScoreWriter(db, {
+          batchSize: parseInt(process.env.SCORE_BATCH_SIZE) || 500,
+          flushInterval: parseInt(process.env.SCORE_FLUSH_MS) || 1000,
+          logger,
+      })
+    : null;
+scoreWriter?.start();
+
+// متریک‌های /metrics
+const metrics = new Registry();
+const httpDuration = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    { labelName: "route" }
+);
+const startGameDuration = metrics.histogram(
+    "game_start_duration_seconds",
+    "Time spent in MathGame.startGame"
+);
+const checkAnswerDuration = metrics.histogram(
+    "game_check_answer_duration_seconds",
+    "Time spent in MathGame.checkAnswer/checkAnswers"
+);
+const cleanupDuration = metrics.histogram(
+    "game_cleanup_duration_seconds",
+    "Duration of cleanupInactivePlayers sweeps",
+    { buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5] }
+);
+const cleanupEvicted = metrics.counter(
+    "game_cleanup_evicted_total",
+    "Players evicted by cleanupInactivePlayers"
+);
 
 class Player {
     constructor(playerId, jwtPayload) {
@@ -51,14 +104,24 @@ class Player {
         this.jwtPayload = jwtPayload; // اطلاعات کاربر از توکن JWT
         this.score = 0;
         this.top_score = 0;
-        this.time_left = 40;
+        this.deadline = 0; // زمان پایان بازی (میلی‌ثانیه)
         this.game_active = false;
         this.current_problem = "";
         this.current_answer = null;
-        this.timer = null;
-        this.should_stop = false;
+        this.seed = 0; // seed دنباله‌ی مسئله‌های این بازی (برای بازبینی)
+        this.problems = null; // دسته‌ی فعلی از mathEngine.generateBatch
+        this.next_problems = null; // دسته‌ی بعدی (فقط وقتی صف به آن برسد)
+        this.problems_base = 0; // شماره‌ی اولین مسئله‌ی دسته‌ی فعلی
+        this.problem_index = 0; // شماره‌ی مسئله‌ی فعلی در کل بازی
         this.last_activity = new Date();
-        logger.info(`New player created: ${jwtPayload?.userId}`);
+        logger.info("New player created", {
+            route: "/api/start",
+            userId: jwtPayload?.userId,
+        });
+    }
+
+    get time_left() {
+        return Math.max(0, Math.ceil((this.deadline - Date.now()) / 1000));
     }
 }
 
@@ -67,7 +130,23 @@ class MathGame {
         this.players = {}; // playerId -> Player
         this.userToPlayerMap = {}; // userId -> playerId
         this.total_time = 40;
+        this.problem_batch = 32;
+        // تعداد مسئله‌هایی که از قبل برای کلاینت فرستاده می‌شوند
+        this.prefetch = Math.min(
+            parseInt(process.env.PREFETCH_PROBLEMS) || 5,
+            this.problem_batch
+        );
+        this.commit_secret =
+            process.env.PROBLEM_SECRET ||
+            process.env.JWT_SECRET ||
+            crypto.randomBytes(32);
         this.cleanup_interval = 600000;
+        this.leaderboard = new LeaderboardIndex(); // userId -> top_score
+        this.timers = new TimerWheel({
+            tickMs: 1000,
+            onExpire: (playerId) => this.expireGame(playerId),
+        });
+        this.timers.start();
         this.startCleanup();
         logger.info("MathGame initialized");
     }
@@ -83,7 +162,9 @@ class MathGame {
     }
 
     cleanupInactivePlayers() {
+        const started = performance.now();
         const now = new Date();
+        let evicted = 0;
         Object.keys(this.players).forEach((pid) => {
             try {
                 if (
@@ -97,41 +178,133 @@ class MathGame {
                         delete this.userToPlayerMap[player.jwtPayload.userId];
                     }
                     
-                    if (player.timer) {
-                        player.should_stop = true;
-                        clearTimeout(player.timer);
-                    }
+                    this.timers.cancel(pid);
                     delete this.players[pid];
+                    evicted += 1;
                     logger.info(`Cleaned up inactive player: ${pid}`);
                 }
             } catch (e) {
                 logger.error(`Error cleaning player ${pid}: ${e.message}`);
             }
         });
+
+        cleanupDuration.observe((performance.now() - started) / 1000);
+        cleanupEvicted.inc(evicted);
     }
 
     runTimer(playerId) {
         const player = this.players[playerId];
         if (!player) return;
 
-        player.should_stop = false;
+        this.timers.schedule(playerId, player.deadline);
+    }
 
-        const tick = () => {
-            if (!player || player.should_stop || !player.game_active) return;
+    // مسئله‌ها از دنباله‌ی seed‌دار همان بازی خوانده می‌شوند؛ حداکثر دو دسته در حافظه می‌ماند
+    batchFor(player, seq) {
+        if (seq - player.problems_base < this.problem_batch) {
+            return player.problems;
+        }
+        if (!player.next_problems) {
+            player.next_problems = mathEngine.generateBatch(this.problem_batch, {
+                seed: player.problems.next_seed,
+            });
+        }
+        return player.next_problems;
+    }
 
-            player.time_left -= 1;
-            player.last_activity = new Date();
+    moveToProblem(player, seq) {
+        if (seq - player.problems_base >= this.problem_batch) {
+            player.problems = this.batchFor(player, seq);
+            player.next_problems = null;
+            player.problems_base += this.problem_batch;
+        }
 
-            if (player.time_left <= 0) {
-                player.game_active = false;
-                logger.info(`Player ${playerId} game over - time expired`);
-                return;
-            }
+        const i = seq - player.problems_base;
+        player.problem_index = seq;
+        player.current_problem = mathEngine.render(player.problems, i);
+        player.current_answer = player.problems.truth[i] === 1;
+    }
+
+    // تعهد HMAC به جواب هر مسئله؛ کلاینت جواب را نمی‌فهمد ولی نمی‌تواند مسئله‌ی دیگری جا بزند
+    commitment(player, seq, truth) {
+        return crypto
+            .createHmac("sha256", this.commit_secret)
+            .update(`${player.id}:${player.seed}:${seq}:${truth}`)
+            .digest("base64url");
+    }
+
+    verifyCommitment(player, seq, commitment) {
+        if (typeof commitment !== "string") return false;
+        const expected = Buffer.from(
+            this.commitment(player, seq, player.current_answer ? 1 : 0)
+        );
+        const given = Buffer.from(commitment);
+        return (
+            given.length === expected.length &&
+            crypto.timingSafeEqual(given, expected)
+        );
+    }
+
+    // مسئله‌ی فعلی به همراه prefetch مسئله‌ی بعدی
+    problemQueue(player) {
+        const queue = [];
+        for (let k = 1; k <= this.prefetch; k++) {
+            const seq = player.problem_index + k;
+            const batch = this.batchFor(player, seq);
+            const i = (seq - player.problems_base) % this.problem_batch;
+            queue.push({
+                seq,
+                problem: mathEngine.render(batch, i),
+                commitment: this.commitment(player, seq, batch.truth[i]),
+            });
+        }
+
+        return {
+            problem: player.current_problem,
+            problem_seq: player.problem_index,
+            commitment: this.commitment(
+                player,
+                player.problem_index,
+                player.current_answer ? 1 : 0
+            ),
+            queue,
+        };
+    }
 
-            player.timer = setTimeout(tick, 1000);
+    updateLeaderboard(player) {
+        const { userId, username, firstName, userImage } = player.jwtPayload;
+        const key = String(userId);
+        const data = {
+            player_id: player.id,
+            username,
+            first_name: firstName,
+            user_image: userImage,
         };
 
-        player.timer = setTimeout(tick, 1000);
+        // در حالت cluster تغییر به بقیه‌ی worker ها هم فرستاده می‌شود
+        if (this.leaderboard.update(key, player.top_score, data) && isClusterWorker) {
+            process.send({ type: "leaderboard", key, score: player.top_score, data });
+        }
+    }
+
+    // پایان بازی (تمام شدن زمان، شروع دوباره یا خاموش شدن سرور)؛ امتیاز در صف دیتابیس می‌رود
+    expireGame(playerId, reason = "time expired") {
+        const player = this.players[playerId];
+        if (!player || !player.game_active) return false;
+
+        player.game_active = false;
+        scoreWriter?.enqueueScore(player.jwtPayload?.userId, player.score);
+        logger.info(`Player ${playerId} game over - ${reason}`);
+        return true;
+    }
+
+    // برای خاموش شدن: همه‌ی بازی‌های در جریان با امتیاز فعلی‌شان تمام می‌شوند
+    endActiveGames(reason) {
+        let ended = 0;
+        for (const playerId in this.players) {
+            if (this.expireGame(playerId, reason)) ended += 1;
+        }
+        return ended;
     }
 
     startGame(jwtPayload) {
@@ -147,13 +320,12 @@ class MathGame {
 
             if (playerId && this.players[playerId]) {
                 const player = this.players[playerId];
-                
+
+                // بازی قبلی که هنوز تمام نشده با امتیاز فعلی‌اش ثبت می‌شود
+                this.expireGame(playerId, "restarted");
+
                 // به روزرسانی اطلاعات کاربر
                 player.jwtPayload = jwtPayload;
-
-                if (player.timer) {
-                    clearTimeout(player.timer);
-                }
             } else {
                 // ایجاد بازیکن جدید
                 playerId = uuidv4();
@@ -166,33 +338,41 @@ class MathGame {
 
             // تنظیمات اولیه بازی
             player.game_active = true;
-            player.time_left = this.total_time;
+            player.deadline = Date.now() + this.total_time * 1000;
             player.score = 0;
 
             if (isNewPlayer) {
-                player.top_score = 0;
+                // رکورد قبلی کاربر حتی بعد از پاک شدن بازیکن در جدول رده‌بندی می‌ماند
+                player.top_score = this.leaderboard.scoreOf(String(userId)) || 0;
             }
+            this.updateLeaderboard(player);
 
-            player.should_stop = false;
             player.last_activity = new Date();
 
             // تولید مسئله جدید
-            const { problem, is_correct } = mathEngine.generate();
-            player.current_problem = problem;
-            player.current_answer = is_correct;
+            player.seed = mathEngine.randomSeed();
+            player.problems = mathEngine.generateBatch(this.problem_batch, {
+                seed: player.seed,
+            });
+            player.next_problems = null;
+            player.problems_base = 0;
+            this.moveToProblem(player, 0);
 
             // شروع تایمر
             this.runTimer(playerId);
 
-            logger.info(`Game started for user ${userId}`, {
+            // seed برای بازپخش بازی لازم است، پس نمونه‌برداری نمی‌شود
+            logger.audit(`Game started for user ${userId}`, {
+                route: "/api/start",
                 playerId,
-                isNewPlayer
+                isNewPlayer,
+                seed: player.seed,
             });
 
             return {
                 status: "success",
                 player_id: playerId,
-                problem: problem,
+                ...this.problemQueue(player),
                 time_left: player.time_left,
                 score: player.score,
                 game_active: true,
@@ -219,6 +399,40 @@ class MathGame {
     }
 
     checkAnswer(userId, userAnswer) {
+        return this.checkAnswers(userId, [{ answer: userAnswer }]);
+    }
+
+    // اعمال یک پاسخ روی مسئله‌ی فعلی؛ زمان بازی با جابه‌جا کردن مهلت تغییر می‌کند
+    applyAnswer(player, userAnswer, now) {
+        const is_correct = userAnswer === player.current_answer;
+
+        if (is_correct) {
+            player.deadline = Math.min(
+                now + this.total_time * 1000,
+                player.deadline + 5000
+            );
+            player.score += 1;
+            if (player.score > player.top_score) {
+                player.top_score = player.score;
+                this.updateLeaderboard(player);
+            }
+        } else {
+            player.deadline -= 10000;
+        }
+
+        if (player.deadline <= now) {
+            this.timers.cancel(player.id);
+            this.expireGame(player.id);
+        } else {
+            this.moveToProblem(player, player.problem_index + 1);
+        }
+
+        return is_correct;
+    }
+
+    // پاسخ‌ها به ترتیب اعمال می‌شوند. پاسخ‌های دسته‌ای (با seq و commitment)
+    // باید دقیقاً از مسئله‌ی فعلی شروع شوند؛ پاسخ‌های تکراری نادیده گرفته می‌شوند.
+    checkAnswers(userId, answers) {
         try {
             const playerId = this.userToPlayerMap[userId];
             if (!playerId || !this.players[playerId]) {
@@ -229,43 +443,56 @@ class MathGame {
             }
 
             const player = this.players[playerId];
-            player.last_activity = new Date();
+            const now = Date.now();
+            player.last_activity = new Date(now);
 
-            if (!player.game_active) {
-                return {
-                    status: "game_over",
-                    final_score: player.score,
-                };
+            if (player.game_active && player.deadline <= now) {
+                this.timers.cancel(playerId);
+                this.expireGame(playerId);
             }
 
-            const is_correct = userAnswer === player.current_answer;
+            const results = [];
+            let rejected = null;
+
+            for (const entry of answers) {
+                if (!player.game_active) break;
+
+                const seq = entry.seq ?? player.problem_index;
+                if (entry.seq !== undefined) {
+                    if (seq < player.problem_index) continue; // قبلاً اعمال شده
+                    if (
+                        seq !== player.problem_index ||
+                        !this.verifyCommitment(player, seq, entry.commitment)
+                    ) {
+                        rejected = seq;
+                        break;
+                    }
+                }
 
-            if (is_correct) {
-                player.time_left = Math.min(40, player.time_left + 5);
-                player.score += 1;
-                player.top_score = Math.max(player.top_score, player.score);
-            } else {
-                player.time_left = Math.max(0, player.time_left - 10);
+                const is_correct = this.applyAnswer(player, entry.answer, now);
+                results.push({ seq, feedback: is_correct ? "correct" : "wrong" });
             }
 
-            if (player.time_left <= 0) {
-                player.game_active = false;
+            if (!player.game_active) {
                 return {
                     status: "game_over",
                     final_score: player.score,
+                    results,
                 };
             }
 
-            const { problem, is_correct: answer } = mathEngine.generate();
-            player.current_problem = problem;
-            player.current_answer = answer;
+            this.runTimer(playerId);
 
             return {
                 status: "continue",
-                problem: problem,
+                ...this.problemQueue(player),
                 time_left: player.time_left,
                 score: player.score,
-                feedback: is_correct ? "correct" : "wrong",
+                feedback: results.length
+                    ? results[results.length - 1].feedback
+                    : null,
+                results,
+                rejected,
                 game_active: true,
             };
         } catch (e) {
@@ -280,6 +507,37 @@ class MathGame {
 
 const gameInstance = new MathGame();
 
+// همگام‌سازی جدول رده‌بندی با بقیه‌ی worker ها
+if (isClusterWorker) {
+    process.on("message", (msg) => {
+        if (msg?.type === "leaderboard") {
+            gameInstance.leaderboard.update(msg.key, msg.score, msg.data);
+        } else if (msg?.type === "leaderboard_snapshot") {
+            for (const row of msg.rows) {
+                gameInstance.leaderboard.update(row.key, row.score, row.data);
+            }
+        }
+    });
+}
+
+// بارگذاری رکوردهای ذخیره‌شده در جدول scores
+if (db) {
+    loadFromScores(gameInstance.leaderboard, db)
+        .then((count) => logger.info(`Leaderboard loaded ${count} users from scores`))
+        .catch((e) => logger.error(`Leaderboard load error: ${e.message}`));
+}
+
+// کش نتیجه‌ی اعتبارسنجی: هر بازی با یک توکن ده‌ها پاسخ می‌فرستد
+const authCacheEnabled = process.env.AUTH_CACHE !== "off";
+const tokenCache = new LRUCache({
+    max: parseInt(process.env.TOKEN_CACHE_SIZE) || 50000,
+});
+const initDataCache = new LRUCache({
+    max: parseInt(process.env.INIT_DATA_CACHE_SIZE) || 10000,
+    ttlMs: parseInt(process.env.INIT_DATA_CACHE_MS) || 60000,
+});
+watchMemoryPressure([tokenCache, initDataCache]);
+
 // Middleware احراز هویت با JWT
 const authenticateToken = (req, res, next) => {
     const authHeader = req.headers["authorization"];
@@ -289,12 +547,24 @@ const authenticateToken = (req, res, next) => {
         return res.status(401).json({ error: "Authentication token required" });
     }
 
+    const cacheKey = authCacheEnabled ? hashKey(token) : null;
+    const cached = cacheKey && tokenCache.get(cacheKey);
+    if (cached) {
+        req.user = cached;
+        return next();
+    }
+
     jwt.verify(token, process.env.JWT_SECRET, (err, decoded) => {
         if (err) {
             logger.error(`JWT verification failed: ${err.message}`);
             return res.status(403).json({ error: "Invalid or expired token" });
         }
 
+        // تا زمان exp توکن معتبر می‌ماند
+        if (cacheKey) {
+            tokenCache.set(cacheKey, decoded, decoded.exp ? decoded.exp * 1000 : undefined);
+        }
+
         req.user = decoded; // ذخیره اطلاعات کاربر در درخواست
         next();
     });
@@ -318,7 +588,12 @@ app.post("/api/telegram-auth", (req, res) => {
         }
 
         // اعتبارسنجی داده‌های تلگرام
-        const userData = validateTelegramData(initData, process.env.BOT_TOKEN);
+        const cacheKey = authCacheEnabled ? hashKey(initData) : null;
+        let userData = cacheKey && initDataCache.get(cacheKey);
+        if (!userData) {
+            userData = validateTelegramData(initData, process.env.BOT_TOKEN);
+            if (cacheKey) initDataCache.set(cacheKey, userData);
+        }
 
         // ساخت JWT
         const token = jwt.sign(
@@ -352,7 +627,7 @@ app.post("/api/telegram-auth", (req, res) => {
             token: token,
         });
     } catch (error) {
-        logger.error("Telegram auth error:", {
+        logger.error("Telegram auth error", {
             error: error.message,
             stack: error.stack,
         });
@@ -369,8 +644,18 @@ app.post("/api/start", authenticateToken, async (req, res) => {
     try {
         const user = req.user; // اطلاعات کاربر از توکن
 
-        logger.info(`Start game request for user: ${user.userId}`);
+        logger.info(`Start game request for user: ${user.userId}`, {
+            route: "/api/start",
+        });
 
+        scoreWriter?.enqueueUser({
+            telegramId: user.userId,
+            username: user.username,
+            firstName: user.firstName,
+            lastName: user.lastName,
+        });
+
+        const started = performance.now();
         const result = await gameInstance.startGame({
             userId: user.userId,
             firstName: user.firstName,
@@ -378,6 +663,7 @@ app.post("/api/start", authenticateToken, async (req, res) => {
             username: user.username,
             userImage: user.userImage,
         });
+        startGameDuration.observe((performance.now() - started) / 1000);
 
         res.json(result);
     } catch (e) {
@@ -398,9 +684,45 @@ app.post("/api/start", authenticateToken, async (req, res) => {
 // ارسال پاسخ با احراز هویت JWT
 app.post("/api/answer", authenticateToken, (req, res) => {
     try {
-        const { answer } = req.body;
+        const { answer, answers } = req.body;
         const user = req.user; // اطلاعات کاربر از توکن
 
+        // ارسال دسته‌ای پاسخ‌ها برای مسئله‌های از پیش دریافت‌شده
+        if (answers !== undefined) {
+            if (
+                !Array.isArray(answers) ||
+                answers.length === 0 ||
+                answers.length > gameInstance.prefetch + 1
+            ) {
+                return res.status(400).json({
+                    status: "error",
+                    message: `answers must be a list of 1-${gameInstance.prefetch + 1} items`,
+                });
+            }
+
+            // هر پاسخ باید { seq, answer } با seq صحیح نامنفی و answer بولی باشد
+            const invalid = answers.findIndex(
+                (entry) =>
+                    typeof entry !== "object" ||
+                    entry === null ||
+                    typeof entry.answer !== "boolean" ||
+                    !Number.isInteger(entry.seq) ||
+                    entry.seq < 0
+            );
+            if (invalid !== -1) {
+                return res.status(400).json({
+                    status: "error",
+                    message: `answers[${invalid}] must be an object with an integer seq and a boolean answer`,
+                });
+            }
+
+            const started = performance.now();
+            const result = gameInstance.checkAnswers(user.userId, answers);
+            checkAnswerDuration.observe((performance.now() - started) / 1000);
+
+            return res.json(result);
+        }
+
         if (answer === undefined) {
             return res.status(400).json({
                 status: "error",
@@ -408,7 +730,9 @@ app.post("/api/answer", authenticateToken, (req, res) => {
             });
         }
 
+        const started = performance.now();
         const result = gameInstance.checkAnswer(user.userId, answer);
+        checkAnswerDuration.observe((performance.now() - started) / 1000);
 
         res.json(result);
     } catch (e) {
@@ -429,23 +753,14 @@ app.post("/api/answer", authenticateToken, (req, res) => {
 // لیست برترین‌ها
 app.get("/api/leaderboard", (req, res) => {
     try {
-        const limit = parseInt(req.query.limit) || 10;
-        const offset = parseInt(req.query.offset) || 0;
-
-        // تبدیل بازیکنان به آرایه و مرتب‌سازی
-        const allPlayers = Object.values(gameInstance.players)
-            .filter(player => player.jwtPayload) // فقط بازیکنان احراز شده
-            .map((player) => ({
-                player_id: player.id,
-                score: player.top_score,
-                username: player.jwtPayload.username,
-                first_name: player.jwtPayload.firstName,
-                user_image: player.jwtPayload.userImage,
-            }))
-            .sort((a, b) => b.score - a.score);
-
-        const leaderboard = allPlayers.slice(offset, offset + limit);
-        const total = allPlayers.length;
+        const limit = Math.min(parseInt(req.query.limit) || 10, 100);
+        const offset = Math.max(parseInt(req.query.offset) || 0, 0);
+
+        // جدول رده‌بندی همیشه مرتب است؛ فقط صفحه‌ی خواسته‌شده خوانده می‌شود
+        const leaderboard = gameInstance.leaderboard
+            .range(offset, limit)
+            .map(({ score, data }) => ({ ...data, score }));
+        const total = gameInstance.leaderboard.size;
 
         res.json({
             status: "success",
@@ -472,6 +787,132 @@ app.get("/api/leaderboard", (req, res) => {
     }
 });
 
+// رتبه‌ی کاربر فعلی
+app.get("/api/leaderboard/me", authenticateToken, (req, res) => {
+    const userId = String(req.user.userId);
+    const rank = gameInstance.leaderboard.rank(userId);
+
+    res.json({
+        status: "success",
+        rank,
+        score: rank ? gameInstance.leaderboard.scoreOf(userId) : 0,
+        total: gameInstance.leaderboard.size,
+    });
+});
+
+// وضعیت داخلی سرور با فرمت Prometheus
+const LOOP_RESOLUTION_MS = 20;
+const loopDelay = monitorEventLoopDelay({ resolution: LOOP_RESOLUTION_MS });
+loopDelay.enable();
+let loopUtilization = performance.eventLoopUtilization();
+
+metrics.gauge("game_players", "Players in memory by state", () => {
+    let active = 0;
+    let idle = 0;
+    for (const pid in gameInstance.players) {
+        if (gameInstance.players[pid].game_active) active += 1;
+        else idle += 1;
+    }
+    return [
+        [{ state: "active" }, active],
+        [{ state: "idle" }, idle],
+    ];
+});
+metrics.gauge("game_user_map_size", "Entries in userToPlayerMap", () =>
+    Object.keys(gameInstance.userToPlayerMap).length
+);
+metrics.gauge("game_timers_scheduled", "Deadlines in the timer wheel", () =>
+    gameInstance.timers.size
+);
+metrics.gauge("game_leaderboard_size", "Users in the leaderboard index", () =>
+    gameInstance.leaderboard.size
+);
+const authCaches = { token: tokenCache, init_data: initDataCache };
+metrics.gauge(
+    "auth_cache_lookups_total",
+    "Auth cache lookups by result",
+    () =>
+        Object.entries(authCaches).flatMap(([cache, { hits, misses }]) => [
+            [{ cache, result: "hit" }, hits],
+            [{ cache, result: "miss" }, misses],
+        ]),
+    { type: "counter" }
+);
+metrics.gauge("auth_cache_size", "Entries in the auth caches", () =>
+    Object.entries(authCaches).map(([cache, { size }]) => [{ cache }, size])
+);
+metrics.gauge(
+    "log_records_total",
+    "Logger records by outcome",
+    () => {
+        const { buffered, ...counters } = logger.stats();
+        return Object.entries(counters).map(([outcome, value]) => [{ outcome }, value]);
+    },
+    { type: "counter" }
+);
+metrics.gauge("log_buffered_records", "Log lines waiting to be written", () =>
+    logger.stats().buffered
+);
+if (scoreWriter) {
+    metrics.gauge("score_writer_queue_depth", "Records waiting to be flushed", () =>
+        scoreWriter.depth
+    );
+    metrics.gauge("score_writer_flush_seconds", "Score writer flush latency", () => {
+        const stats = scoreWriter.stats();
+        return [
+            [{ stat: "last" }, stats.last_flush_ms / 1000],
+            [{ stat: "avg" }, stats.avg_flush_ms / 1000],
+            [{ stat: "max" }, stats.max_flush_ms / 1000],
+        ];
+    });
+    metrics.gauge(
+        "score_writer_records_total",
+        "Score writer record counters",
+        () => {
+            const stats = scoreWriter.stats();
+            return [
+                [{ result: "scores_written" }, stats.scores_written],
+                [{ result: "users_written" }, stats.users_written],
+                [{ result: "dropped" }, stats.dropped],
+                [{ result: "failed_flushes" }, stats.failed_flushes],
+            ];
+        },
+        { type: "counter" }
+    );
+}
+// تأخیر حلقه‌ی رویداد از آخرین scrape؛ هیستوگرام خود resolution را هم می‌شمارد و کم می‌شود
+metrics.gauge("nodejs_eventloop_delay_seconds", "Event loop delay since last scrape", () => {
+    const delay = (ns) => Math.max(0, ns / 1e6 - LOOP_RESOLUTION_MS) / 1000;
+    const values = [
+        [{ quantile: "0.5" }, delay(loopDelay.percentile(50))],
+        [{ quantile: "0.99" }, delay(loopDelay.percentile(99))],
+        [{ quantile: "max" }, delay(loopDelay.max)],
+    ];
+    loopDelay.reset();
+    return values;
+});
+// سهم زمانی که حلقه‌ی رویداد از آخرین scrape مشغول بوده (۰ تا ۱)
+metrics.gauge("nodejs_eventloop_utilization", "Event loop utilization since last scrape", () => {
+    const current = performance.eventLoopUtilization();
+    const value = performance.eventLoopUtilization(current, loopUtilization).utilization;
+    loopUtilization = current;
+    return value;
+});
+metrics.gauge("nodejs_memory_bytes", "Process memory usage", () => {
+    const memory = process.memoryUsage();
+    return [
+        [{ type: "heap_used" }, memory.heapUsed],
+        [{ type: "heap_total" }, memory.heapTotal],
+        [{ type: "rss" }, memory.rss],
+        [{ type: "external" }, memory.external],
+    ];
+});
+
+app.get("/metrics", (req, res) => {
+    res.set("Content-Type", "text/plain; version=0.0.4");
+    res.send(metrics.render());
+});
+
 // Route اصلی برای فرانت‌اند
 app.get("*", (req, res) => {
     res.sendFile(path.join(__dirname, "../frontend/build", "index.html"));
@@ -479,7 +920,40 @@ app.get("*", (req, res) => {
 
 // پورت از متغیر محیطی استفاده می‌کند
 const PORT = process.env.PORT || 10000;
-app.listen(PORT, () => {
+// worker های cluster فقط از proxy روی همین ماشین درخواست می‌گیرند
+const HOST = isClusterWorker ? "127.0.0.1" : undefined;
+const server = app.listen(PORT, HOST, () => {
     logger.info(`Server running on port ${PORT}`);
     logger.info(`Allowed CORS origins: ${allowedOrigins.join(", ")}`);
-});
\ No newline at end of file
+    if (isClusterWorker) process.send({ type: "ready" });
+});
+
+// خاموش شدن مرتب: اول درخواست جدید قبول نمی‌شود، بعد صف دیتابیس خالی می‌شود
+const shutdown = async (signal) => {
+    logger.info(`${signal} received, shutting down`);
+    server.close();
+    gameInstance.timers.stop();
+
+    // امتیاز بازی‌های نیمه‌تمام هم قبل از خالی کردن صف ثبت می‌شود
+    const ended = gameInstance.endActiveGames("server shutdown");
+    if (ended > 0) logger.info(`Ended ${ended} active games for shutdown`);
+
+    try {
+        if (scoreWriter) {
+            await scoreWriter.drain({
+                timeout: parseInt(process.env.SCORE_DRAIN_MS) || 10000,
+            });
+            logger.info("Score writer drained", scoreWriter.stats());
+            await db.sequelize.close();
+        }
+    } catch (e) {
+        logger.error(`Shutdown error: ${e.message}`);
+    } finally {
+        await logger.drain({ timeout: 2000 });
+        logger.flushSync();
+        process.exit(0);
+    }
+};
+
+process.once("SIGTERM", shutdown);
+process.once("SIGINT", shutdown);
\ No newline at end of file
@@ -0,0 +1,92 @@
+// کش محدود (LRU) برای نتیجه‌ی اعتبارسنجی توکن‌ها و initData تلگرام.
+// کلید همیشه هش ورودی است تا خود توکن در حافظه نگه داشته نشود.
+const crypto = require("crypto");
+const v8 = require("v8");
+
+function hashKey(value) {
+    return crypto.createHash("sha256").update(value).digest("base64");
+}
+
+class LRUCache {
+    constructor({ max = 10000, ttlMs = Infinity } = {}) {
+        this.max = max;
+        this.ttlMs = ttlMs;
+        this.map = new Map(); // ترتیب درج Map همان ترتیب استفاده است
+        this.hits = 0;
+        this.misses = 0;
+        this.evictions = 0;
+    }
+
+    get size() {
+        return this.map.size;
+    }
+
+    get(key) {
+        const entry = this.map.get(key);
+        if (!entry) {
+            this.misses += 1;
+            return undefined;
+        }
+        if (entry.expires <= Date.now()) {
+            this.map.delete(key);
+            this.misses += 1;
+            return undefined;
+        }
+
+        // جابه‌جایی به انتهای صف (تازه‌ترین)
+        this.map.delete(key);
+        this.map.set(key, entry);
+        this.hits += 1;
+        return entry.value;
+    }
+
+    // expires زمان مطلق انقضا است (مثلاً exp توکن)، محدود به ttlMs
+    set(key, value, expires = Infinity) {
+        const limit = Date.now() + this.ttlMs;
+        this.map.delete(key);
+        this.map.set(key, { value, expires: Math.min(expires, limit) });
+        if (this.map.size > this.max) this.shrink(this.max);
+    }
+
+    // نگه داشتن فقط keep مورد تازه‌تر
+    shrink(keep) {
+        for (const key of this.map.keys()) {
+            if (this.map.size <= keep) break;
+            this.map.delete(key);
+            this.evictions += 1;
+        }
+    }
+
+    clear() {
+        this.evictions += this.map.size;
+        this.map.clear();
+    }
+
+    stats() {
+        const lookups = this.hits + this.misses;
+        return {
+            size: this.map.size,
+            hits: this.hits,
+            misses: this.misses,
+            evictions: this.evictions,
+            hit_rate: lookups ? this.hits / lookups : 0,
+        };
+    }
+}
+
+// وقتی heap به حد خودش نزدیک می‌شود، کش‌ها نصف می‌شوند
+function watchMemoryPressure(caches, { intervalMs = 10000, threshold = 0.85 } = {}) {
+    const interval = setInterval(() => {
+        const { used_heap_size, heap_size_limit } = v8.getHeapStatistics();
+        if (used_heap_size / heap_size_limit < threshold) return;
+        for (const cache of caches) cache.shrink(Math.floor(cache.size / 2));
+    }, intervalMs);
+    interval.unref?.();
+    return interval;
+}
+
+module.exports = {
+    LRUCache,
+    hashKey,
+    watchMemoryPressure,
+};
@@ -0,0 +1,108 @@
+// تعداد درخواست در ثانیه روی /api/answer با کش توکن و بدون آن.
+// هر حالت یک Server.js جدا اجرا می‌کند (AUTH_CACHE=on|off).
+// اجرا: node bench/auth_cache.js   (BENCH_SECONDS، BENCH_CONNECTIONS، BENCH_USERS)
+const http = require("http");
+const path = require("path");
+const { spawn } = require("child_process");
+const jwt = require("jsonwebtoken");
+
+const SECONDS = Number(process.env.BENCH_SECONDS) || 10;
+const CONNECTIONS = Number(process.env.BENCH_CONNECTIONS) || 64;
+const USERS = Number(process.env.BENCH_USERS) || 256;
+const PORT = Number(process.env.BENCH_PORT) || 18080;
+const JWT_SECRET = "bench-secret";
+
+const agent = new http.Agent({ keepAlive: true, maxSockets: CONNECTIONS });
+
+function post(pathname, token, body) {
+    return new Promise((resolve, reject) => {
+        const data = JSON.stringify(body || {});
+        const req = http.request(
+            {
+                host: "127.0.0.1",
+                port: PORT,
+                method: "POST",
+                path: pathname,
+                agent,
+                headers: {
+                    "Content-Type": "application/json",
+                    "Content-Length": Buffer.byteLength(data),
+                    Authorization: `Bearer ${token}`,
+                },
+            },
+            (res) => {
+                let text = "";
+                res.on("data", (chunk) => (text += chunk));
+                res.on("end", () => resolve(JSON.parse(text)));
+            }
+        );
+        req.on("error", reject);
+        req.end(data);
+    });
+}
+
+function startServer(cacheMode) {
+    return new Promise((resolve, reject) => {
+        const child = spawn(process.execPath, [path.join(__dirname, "../Server.js")], {
+            env: {
+                ...process.env,
+                PORT: String(PORT),
+                JWT_SECRET,
+                AUTH_CACHE: cacheMode,
+                USE_DB: "false",
+            },
+            stdio: ["ignore", "pipe", "inherit"],
+        });
+        child.stdout.on("data", (chunk) => {
+            if (String(chunk).includes("Server running")) resolve(child);
+        });
+        child.stdout.resume();
+        child.on("exit", (code) => reject(new Error(`Server exited with ${code}`)));
+    });
+}
+
+async function run(cacheMode) {
+    const server = await startServer(cacheMode);
+    const tokens = Array.from({ length: USERS }, (_, i) =>
+        jwt.sign({ userId: 100000 + i, firstName: `Bench ${i}` }, JWT_SECRET, {
+            expiresIn: "1h",
+        })
+    );
+    await Promise.all(tokens.map((token) => post("/api/start", token)));
+
+    let requests = 0;
+    const deadline = Date.now() + SECONDS * 1000;
+
+    const connection = async (c) => {
+        let i = c;
+        while (Date.now() < deadline) {
+            const token = tokens[i % USERS];
+            const result = await post("/api/answer", token, { answer: true });
+            requests += 1;
+            if (result.status === "game_over") await post("/api/start", token);
+            i += CONNECTIONS;
+        }
+    };
+
+    const started = process.hrtime.bigint();
+    await Promise.all(Array.from({ length: CONNECTIONS }, (_, c) => connection(c)));
+    const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+
+    server.kill("SIGTERM");
+    await new Promise((resolve) => server.once("exit", resolve));
+
+    return {
+        auth_cache: cacheMode,
+        requests,
+        "req/sec": Math.round(requests / seconds),
+    };
+}
+
+(async () => {
+    const results = [];
+    for (const mode of ["off", "on"]) {
+        results.push(await run(mode));
+    }
+    console.table(results);
+    process.exit(0);
+})();
@@ -0,0 +1,382 @@
+// تست بار کامل: telegram-auth → start → answer → leaderboard بدون نیاز به تلگرام.
+// initData با یک BOT_TOKEN محلی امضا می‌شود، پس validateTelegramData واقعی اجرا می‌شود.
+//
+// اجرا:
+//   node bench/load.js [--players 2000] [--concurrency 200] [--answers 20] [--polls 3]
+//                      [--protocol batch|single] [--batch 3]
+//                      [--target http://host:port] [--bot-token TOKEN] [--out run.json]
+//   node bench/load.js --compare base.json run.json [--threshold 0.1]
+//
+// بدون --target یک Server.js محلی روی BENCH_PORT (پیش‌فرض 18090) اجرا می‌شود.
+// برای هر route: p50/p99، درخواست در ثانیه و تغییر heap سرور (از /metrics) گزارش می‌شود.
+// پاسخ‌ها مثل App.js دسته‌ای ({answers: [{seq, commitment, answer}]}) فرستاده می‌شوند؛
+// --protocol single همان {answer} قدیمی را می‌فرستد.
+const crypto = require("crypto");
+const fs = require("fs");
+const http = require("http");
+const path = require("path");
+const { spawn } = require("child_process");
+
+function parseArgs(argv) {
+    const args = {};
+    for (let i = 0; i < argv.length; i++) {
+        if (!argv[i].startsWith("--")) continue;
+        const key = argv[i].slice(2);
+        const next = argv[i + 1];
+        if (next === undefined || next.startsWith("--")) {
+            args[key] = true;
+        } else if (key === "compare") {
+            args.compare = [next, argv[i + 2]];
+            i += 2;
+        } else {
+            args[key] = next;
+            i += 1;
+        }
+    }
+    return args;
+}
+
+const args = parseArgs(process.argv.slice(2));
+const PLAYERS = Number(args.players) || 2000;
+const CONCURRENCY = Number(args.concurrency) || 200;
+const ANSWERS = Number(args.answers) || 20;
+const POLLS = Number(args.polls) || 3;
+const PROTOCOL = args.protocol === "single" ? "single" : "batch";
+const BATCH = Number(args.batch) || 3;
+const BOT_TOKEN = args["bot-token"] || process.env.BOT_TOKEN || "123456:load-test-token";
+const PORT = Number(process.env.BENCH_PORT) || 18090;
+const target = new URL(args.target || `http://127.0.0.1:${PORT}`);
+
+const agent = new http.Agent({ keepAlive: true, maxSockets: CONCURRENCY });
+
+// امضای initData مثل خود تلگرام:
+// secret = HMAC_SHA256("WebAppData", botToken)، hash = HMAC_SHA256(secret, data_check_string)
+function mintInitData(user, botToken) {
+    const params = {
+        auth_date: String(Math.floor(Date.now() / 1000)),
+        query_id: `load-${user.id}`,
+        user: JSON.stringify(user),
+    };
+    const dataCheckString = Object.keys(params)
+        .sort()
+        .map((key) => `${key}=${params[key]}`)
+        .join("\n");
+    const secret = crypto.createHmac("sha256", "WebAppData").update(botToken).digest();
+    const hash = crypto.createHmac("sha256", secret).update(dataCheckString).digest("hex");
+    return new URLSearchParams({ ...params, hash }).toString();
+}
+
+function request(method, pathname, { token, body } = {}) {
+    return new Promise((resolve, reject) => {
+        const data = body === undefined ? null : JSON.stringify(body);
+        const headers = {};
+        if (data) {
+            headers["Content-Type"] = "application/json";
+            headers["Content-Length"] = Buffer.byteLength(data);
+        }
+        if (token) headers.Authorization = `Bearer ${token}`;
+
+        const started = process.hrtime.bigint();
+        const req = http.request(
+            {
+                host: target.hostname,
+                port: target.port,
+                method,
+                path: pathname,
+                agent,
+                headers,
+            },
+            (res) => {
+                let text = "";
+                res.setEncoding("utf8");
+                res.on("data", (chunk) => (text += chunk));
+                res.on("end", () =>
+                    resolve({
+                        status: res.statusCode,
+                        text,
+                        ms: Number(process.hrtime.bigint() - started) / 1e6,
+                    })
+                );
+            }
+        );
+        req.on("error", reject);
+        req.end(data);
+    });
+}
+
+async function serverMemory() {
+    try {
+        const { text } = await request("GET", "/metrics");
+        const read = (type) => {
+            const match = text.match(new RegExp(`nodejs_memory_bytes\\{type="${type}"\\} (\\d+)`));
+            return match ? Number(match[1]) : null;
+        };
+        return { heap_used: read("heap_used"), rss: read("rss") };
+    } catch (e) {
+        return { heap_used: null, rss: null };
+    }
+}
+
+function percentile(sorted, p) {
+    if (sorted.length === 0) return 0;
+    return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+}
+
+// tasks را با CONCURRENCY درخواست هم‌زمان اجرا می‌کند
+async function runTasks(tasks, onResult = () => {}) {
+    let next = 0;
+    const worker = async () => {
+        while (next < tasks.length) {
+            const task = tasks[next++];
+            try {
+                onResult(await task());
+            } catch (e) {
+                onResult(null);
+            }
+        }
+    };
+    await Promise.all(Array.from({ length: CONCURRENCY }, worker));
+}
+
+// هر route یک مرحله‌ی جدا دارد تا تغییر حافظه را بشود به همان route نسبت داد.
+// مرحله می‌تواند چند دور باشد؛ prepare قبل از هر دور اجرا می‌شود و در زمان و rps حساب نمی‌شود
+// (ولی تغییر حافظه‌ی آن جزو همین مرحله است).
+async function phase(route, tasksForRound, { rounds = 1, prepare = null } = {}) {
+    const latencies = [];
+    let errors = 0;
+    let seconds = 0;
+    const before = await serverMemory();
+
+    for (let round = 0; round < rounds; round++) {
+        if (prepare) await prepare(round);
+
+        const started = process.hrtime.bigint();
+        await runTasks(tasksForRound(round), (result) => {
+            if (!result) {
+                errors += 1;
+                return;
+            }
+            latencies.push(result.ms);
+            if (result.status >= 400 || result.failed) errors += 1;
+        });
+        seconds += Number(process.hrtime.bigint() - started) / 1e9;
+    }
+
+    const after = await serverMemory();
+    latencies.sort((a, b) => a - b);
+
+    const mb = (a, b) => (a === null || b === null ? null : +((b - a) / 1048576).toFixed(2));
+    return {
+        route,
+        requests: latencies.length,
+        errors,
+        p50_ms: +percentile(latencies, 50).toFixed(2),
+        p99_ms: +percentile(latencies, 99).toFixed(2),
+        max_ms: +(latencies[latencies.length - 1] || 0).toFixed(2),
+        rps: seconds ? Math.round(latencies.length / seconds) : 0,
+        heap_delta_mb: mb(before.heap_used, after.heap_used),
+        rss_delta_mb: mb(before.rss, after.rss),
+    };
+}
+
+function startServer() {
+    return new Promise((resolve, reject) => {
+        const child = spawn(process.execPath, [path.join(__dirname, "../Server.js")], {
+            env: {
+                ...process.env,
+                PORT: String(PORT),
+                BOT_TOKEN,
+                JWT_SECRET: process.env.JWT_SECRET || "load-test-secret",
+                USE_DB: process.env.USE_DB || "false",
+                LOG_LEVEL: process.env.LOG_LEVEL || "warn",
+            },
+            stdio: ["ignore", "ignore", "inherit"],
+        });
+        child.once("exit", (code) => reject(new Error(`Server exited with ${code}`)));
+
+        // تا وقتی پورت جواب بدهد صبر می‌کنیم (لاگ‌ها ممکن است خاموش باشند)
+        const poll = () =>
+            request("GET", "/api/leaderboard")
+                .then(() => resolve(child))
+                .catch(() => setTimeout(poll, 100));
+        poll();
+    });
+}
+
+// وضعیت صف مسئله‌ها از پاسخ start/answer (همان فیلدهای problemQueue در Server.js)
+function trackProblems(player, data) {
+    player.current = { seq: data.problem_seq, commitment: data.commitment };
+    player.queue = data.queue || [];
+}
+
+async function answer(player) {
+    const body =
+        PROTOCOL === "batch"
+            ? {
+                  answers: [player.current, ...player.queue]
+                      .slice(0, BATCH)
+                      .map(({ seq, commitment }) => ({
+                          seq,
+                          commitment,
+                          answer: Math.random() < 0.6,
+                      })),
+              }
+            : { answer: Math.random() < 0.6 };
+
+    const result = await request("POST", "/api/answer", { token: player.token, body });
+    if (result.status !== 200) return result;
+
+    const data = JSON.parse(result.text);
+    if (data.status === "game_over") {
+        player.active = false;
+    } else if (data.status === "continue") {
+        trackProblems(player, data);
+        // کلاینت درستی که صف را دنبال می‌کند نباید رد شود
+        if (data.rejected !== null && data.rejected !== undefined) result.failed = true;
+    } else {
+        result.failed = true;
+    }
+    return result;
+}
+
+async function run() {
+    const server = args.target ? null : await startServer();
+    const players = Array.from({ length: PLAYERS }, (_, i) => ({
+        user: {
+            id: 700000000 + i,
+            first_name: `Load${i}`,
+            username: `load_${i}`,
+        },
+        token: null,
+        active: false,
+        current: null, // { seq, commitment } مسئله‌ی فعلی
+        queue: [], // مسئله‌های از پیش دریافت‌شده
+    }));
+
+    const results = [];
+
+    results.push(
+        await phase("/api/telegram-auth", () =>
+            players.map((player) => async () => {
+                const initData = mintInitData(player.user, BOT_TOKEN);
+                const result = await request("POST", "/api/telegram-auth", { body: { initData } });
+                if (result.status === 200) player.token = JSON.parse(result.text).token;
+                return result;
+            })
+        )
+    );
+
+    const authed = players.filter((player) => player.token);
+
+    const startGame = async (player) => {
+        const result = await request("POST", "/api/start", { token: player.token });
+        player.active = result.status === 200;
+        if (player.active) trackProblems(player, JSON.parse(result.text));
+        return result;
+    };
+
+    results.push(await phase("/api/start", () => authed.map((player) => () => startGame(player))));
+
+    // هر دور یک درخواست برای هر بازیکن؛ بازی‌های تمام‌شده قبل از دور بعد دوباره شروع می‌شوند
+    results.push(
+        await phase("/api/answer", () => authed.map((player) => () => answer(player)), {
+            rounds: ANSWERS,
+            prepare: () =>
+                runTasks(
+                    authed
+                        .filter((player) => !player.active)
+                        .map((player) => () => startGame(player))
+                ),
+        })
+    );
+
+    results.push(
+        await phase(
+            "/api/leaderboard",
+            () =>
+                authed.map((player, i) => () =>
+                    request("GET", `/api/leaderboard?limit=10&offset=${(i % 10) * 10}`)
+                ),
+            { rounds: POLLS }
+        )
+    );
+
+    if (server) {
+        server.removeAllListeners("exit");
+        server.kill("SIGTERM");
+    }
+
+    const report = {
+        date: new Date().toISOString(),
+        node: process.version,
+        config: {
+            players: PLAYERS,
+            concurrency: CONCURRENCY,
+            answers: ANSWERS,
+            polls: POLLS,
+            protocol: PROTOCOL,
+            batch: PROTOCOL === "batch" ? BATCH : 1,
+        },
+        results,
+    };
+
+    console.table(results);
+    if (args.out) {
+        fs.writeFileSync(args.out, JSON.stringify(report, null, 2));
+        console.log(`Saved to ${args.out}`);
+    }
+}
+
+// مقایسه‌ی دو اجرا؛ اگر p99 یا rps بیش از threshold بدتر شده باشد کد خروج ۱ است
+function compare(basePath, runPath) {
+    const threshold = Number(args.threshold) || 0.1;
+    const base = JSON.parse(fs.readFileSync(basePath, "utf8"));
+    const current = JSON.parse(fs.readFileSync(runPath, "utf8"));
+    const byRoute = new Map(base.results.map((row) => [row.route, row]));
+
+    const change = (from, to) => (from ? (to - from) / from : 0);
+    const pct = (value) => `${value >= 0 ? "+" : ""}${(value * 100).toFixed(1)}%`;
+
+    let regressions = 0;
+    const rows = current.results.map((row) => {
+        const old = byRoute.get(row.route);
+        if (!old) return { route: row.route, note: "new route" };
+
+        const p50 = change(old.p50_ms, row.p50_ms);
+        const p99 = change(old.p99_ms, row.p99_ms);
+        const rps = change(old.rps, row.rps);
+        const regressed = p99 > threshold || rps < -threshold;
+        if (regressed) regressions += 1;
+
+        return {
+            route: row.route,
+            p50_ms: `${old.p50_ms} → ${row.p50_ms} (${pct(p50)})`,
+            p99_ms: `${old.p99_ms} → ${row.p99_ms} (${pct(p99)})`,
+            rps: `${old.rps} → ${row.rps} (${pct(rps)})`,
+            heap_delta_mb: `${old.heap_delta_mb} → ${row.heap_delta_mb}`,
+            regressed,
+        };
+    });
+
+    console.table(rows);
+    if (base.config && JSON.stringify(base.config) !== JSON.stringify(current.config)) {
+        console.log("Warning: runs used different configs", base.config, current.config);
+    }
+    console.log(
+        regressions
+            ? `${regressions} route(s) regressed beyond ${threshold * 100}%`
+            : "No regressions"
+    );
+    process.exitCode = regressions ? 1 : 0;
+}
+
+if (args.compare) {
+    compare(...args.compare);
+} else {
+    run()
+        .then(() => process.exit(0))
+        .catch((e) => {
+            console.error(e);
+            process.exit(1);
+        });
+}
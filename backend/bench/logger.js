@@ -0,0 +1,82 @@
+// مقایسه‌ی لاگر قبلی (console.log همگام با رشته‌ی ISO) و logger.js
+// هر دو در یک فایل موقت می‌نویسند؛ پیام‌ها در دسته‌های ۱۰۰ تایی بین تیک‌های حلقه‌ی رویداد ساخته می‌شوند.
+// اجرا: node bench/logger.js [تعداد پیام]
+const fs = require("fs");
+const os = require("os");
+const path = require("path");
+const { monitorEventLoopDelay } = require("perf_hooks");
+const { Logger } = require("../logger.js");
+
+const MESSAGES = Number(process.argv[2]) || 200000;
+const PER_TICK = 100;
+
+function tmpFile(name) {
+    return path.join(os.tmpdir(), `logger-bench-${process.pid}-${name}.log`);
+}
+
+// همان رفتار logger قبلی Server.js؛ console.log روی فایل همگام می‌نویسد
+function legacyLogger(file) {
+    const fd = fs.openSync(file, "a");
+    return {
+        info: (message) =>
+            fs.writeSync(fd, `[INFO] ${new Date().toISOString()} - ${message}\n`),
+        done: () => fs.closeSync(fd),
+    };
+}
+
+function asyncLogger(file) {
+    const logger = new Logger({ file, maxBuffer: 50000 });
+    return {
+        info: (message, fields) => logger.info(message, fields),
+        done: async () => {
+            await logger.drain();
+            clearInterval(logger.interval);
+            fs.closeSync(logger.fd);
+        },
+        stats: () => logger.stats(),
+    };
+}
+
+async function measure(name, create) {
+    const file = tmpFile(name);
+    const logger = create(file);
+    const histogram = monitorEventLoopDelay({ resolution: 1 });
+    histogram.enable();
+
+    let callNs = 0n;
+    const started = process.hrtime.bigint();
+    for (let sent = 0; sent < MESSAGES; sent += PER_TICK) {
+        const t = process.hrtime.bigint();
+        for (let i = 0; i < PER_TICK; i++) {
+            logger.info(`Start game request for user: ${sent + i}`, {
+                route: "/api/start",
+                playerId: sent + i,
+            });
+        }
+        callNs += process.hrtime.bigint() - t;
+        await new Promise((resolve) => setImmediate(resolve));
+    }
+    await logger.done();
+    const totalMs = Number(process.hrtime.bigint() - started) / 1e6;
+    histogram.disable();
+
+    const stats = logger.stats?.();
+    const bytes = fs.statSync(file).size;
+    fs.unlinkSync(file);
+
+    return {
+        logger: name,
+        "msgs/sec": Math.round(MESSAGES / (totalMs / 1000)),
+        "call ns/msg": Number(callNs / BigInt(MESSAGES)),
+        loop_p99_ms: +(histogram.percentile(99) / 1e6).toFixed(2),
+        dropped: stats ? stats.dropped : 0,
+        mb_written: +(bytes / 1024 / 1024).toFixed(1),
+    };
+}
+
+(async () => {
+    const results = [];
+    results.push(await measure("console (sync)", legacyLogger));
+    results.push(await measure("logger.js (async)", asyncLogger));
+    console.table(results);
+})();
@@ -0,0 +1,110 @@
+// مقایسه‌ی سرعت و تخصیص حافظه‌ی generate قدیمی، generate فعلی و generateBatch
+// اجرا: node --expose-gc bench/math_engine.js [تعداد]
+const { PerformanceObserver } = require("perf_hooks");
+const mathEngine = require("../math_engine.js");
+
+const ITERATIONS = Number(process.argv[2]) || 2000000;
+
+// نسخه‌ی قبلی generate برای مقایسه
+const OPS = {
+    "+": (a, b) => a + b,
+    "-": (a, b) => a - b,
+    "×": (a, b) => a * b,
+    "÷": (a, b) => Math.floor(a / b),
+};
+
+function legacyPickNumbers(op) {
+    let a, b;
+    if (op === "×" || op === "÷") {
+        a = Math.floor(Math.random() * 11) + 2;
+        b = Math.floor(Math.random() * 11) + 2;
+        if (op === "÷") a = a * b;
+    } else {
+        a = Math.floor(Math.random() * 101) + 20;
+        b = Math.floor(Math.random() * 120) + 1;
+    }
+    if (op === "-" && b > a) [a, b] = [b, a];
+    return [a, b];
+}
+
+function legacyGenerate() {
+    const ops = Object.keys(OPS);
+    const op = ops[Math.floor(Math.random() * ops.length)];
+    const [a, b] = legacyPickNumbers(op);
+    const correct = OPS[op](a, b);
+    let result, is_correct;
+    if (Math.random() < 0.6) {
+        result = correct;
+        is_correct = true;
+    } else {
+        const delta = Math.floor(Math.random() * Math.max(3, Math.abs(correct) / 4)) + 1;
+        result = correct + (Math.random() < 0.5 ? -delta : delta);
+        if (op === "÷" && result === 0) result += 1;
+        is_correct = false;
+    }
+    return { problem: `${result} = ${a} ${op} ${b}`, is_correct };
+}
+
+let gcCount = 0;
+new PerformanceObserver((list) => {
+    gcCount += list.getEntries().length;
+}).observe({ entryTypes: ["gc"] });
+
+// sink جلوی حذف شدن کار توسط بهینه‌ساز را می‌گیرد
+let sink = 0;
+
+const cases = {
+    "legacy generate()": () => {
+        for (let i = 0; i < ITERATIONS; i++) {
+            const { problem, is_correct } = legacyGenerate();
+            sink += problem.length + is_correct;
+        }
+    },
+    "generate()": () => {
+        for (let i = 0; i < ITERATIONS; i++) {
+            const { problem, is_correct } = mathEngine.generate();
+            sink += problem.length + is_correct;
+        }
+    },
+    "generateBatch (no render)": () => {
+        for (let done = 0; done < ITERATIONS; done += 1024) {
+            const batch = mathEngine.generateBatch(1024);
+            sink += batch.truth[0];
+        }
+    },
+    "generateBatch + render": () => {
+        for (let done = 0; done < ITERATIONS; done += 1024) {
+            const batch = mathEngine.generateBatch(1024);
+            for (let i = 0; i < batch.length; i++) {
+                sink += mathEngine.render(batch, i).length + batch.truth[i];
+            }
+        }
+    },
+};
+
+(async () => {
+    const results = [];
+    for (const [name, run] of Object.entries(cases)) {
+        run(); // گرم کردن JIT
+        global.gc?.();
+        await new Promise((resolve) => setImmediate(resolve));
+
+        gcCount = 0;
+        const heapBefore = process.memoryUsage().heapUsed;
+        const started = process.hrtime.bigint();
+        run();
+        const ms = Number(process.hrtime.bigint() - started) / 1e6;
+        const heapAfter = process.memoryUsage().heapUsed;
+        await new Promise((resolve) => setImmediate(resolve)); // تحویل رویدادهای gc
+
+        results.push({
+            case: name,
+            "ops/sec": Math.round(ITERATIONS / (ms / 1000)),
+            "ns/op": +((ms * 1e6) / ITERATIONS).toFixed(1),
+            gc_events: gcCount,
+            heap_delta_kb: Math.round((heapAfter - heapBefore) / 1024),
+        });
+    }
+    console.table(results);
+    if (sink === -1) console.log(sink);
+})();
@@ -0,0 +1,106 @@
+// مقایسه‌ی تأخیر حلقه‌ی رویداد و مصرف CPU بین زنجیره‌ی setTimeout قدیمی و چرخ زمان‌سنج
+// اجرا: node bench/timers.js [تعداد بازی‌ها...]
+// مدت هر اجرا با BENCH_SECONDS (پیش‌فرض 10) تنظیم می‌شود.
+const { monitorEventLoopDelay } = require("perf_hooks");
+const TimerWheel = require("../timer_wheel.js");
+
+const SECONDS = Number(process.env.BENCH_SECONDS) || 10;
+const TOTAL_TIME = 40;
+const sizes = process.argv.slice(2).map(Number).filter(Boolean);
+const GAME_COUNTS = sizes.length ? sizes : [1000, 10000, 50000];
+
+// همان منطق قبلی MathGame.runTimer: هر بازیکن هر ثانیه یک setTimeout
+function legacy(count) {
+    const players = [];
+    for (let i = 0; i < count; i++) {
+        const player = {
+            time_left: 1 + Math.floor(Math.random() * TOTAL_TIME),
+            game_active: true,
+            should_stop: false,
+            last_activity: new Date(),
+            timer: null,
+        };
+        const tick = () => {
+            if (player.should_stop || !player.game_active) return;
+            player.time_left -= 1;
+            player.last_activity = new Date();
+            if (player.time_left <= 0) {
+                // بازی تمام شد؛ برای ثابت ماندن بار، بازی جدیدی شروع می‌شود
+                player.time_left = TOTAL_TIME;
+            }
+            player.timer = setTimeout(tick, 1000);
+        };
+        player.timer = setTimeout(tick, 1000);
+        players.push(player);
+    }
+    return () => {
+        for (const player of players) {
+            player.should_stop = true;
+            clearTimeout(player.timer);
+        }
+    };
+}
+
+function wheel(count) {
+    const players = new Map();
+    const timers = new TimerWheel({
+        tickMs: 1000,
+        onExpire: (id) => {
+            const player = players.get(id);
+            player.deadline = Date.now() + TOTAL_TIME * 1000;
+            timers.schedule(id, player.deadline);
+        },
+    });
+    const now = Date.now();
+    for (let i = 0; i < count; i++) {
+        const player = {
+            deadline: now + (1 + Math.floor(Math.random() * TOTAL_TIME)) * 1000,
+            game_active: true,
+        };
+        players.set(i, player);
+        timers.schedule(i, player.deadline);
+    }
+    timers.start();
+    return () => timers.stop();
+}
+
+const RESOLUTION_MS = 10;
+
+// هیستوگرام فاصله‌ی نمونه‌برداری خودش را هم می‌شمارد؛ تأخیر واقعی = مقدار - resolution
+const lagMs = (ns) => +Math.max(0, ns / 1e6 - RESOLUTION_MS).toFixed(2);
+
+function measure(name, setup, count) {
+    return new Promise((resolve) => {
+        const histogram = monitorEventLoopDelay({ resolution: RESOLUTION_MS });
+        const teardown = setup(count);
+        const cpuStart = process.cpuUsage();
+        const wallStart = process.hrtime.bigint();
+        histogram.enable();
+
+        setTimeout(() => {
+            histogram.disable();
+            const cpu = process.cpuUsage(cpuStart);
+            const wallMs = Number(process.hrtime.bigint() - wallStart) / 1e6;
+            teardown();
+            resolve({
+                path: name,
+                games: count,
+                lag_p50_ms: lagMs(histogram.percentile(50)),
+                lag_p99_ms: lagMs(histogram.percentile(99)),
+                lag_max_ms: lagMs(histogram.max),
+                cpu_pct: +(((cpu.user + cpu.system) / 1000 / wallMs) * 100).toFixed(1),
+            });
+        }, SECONDS * 1000);
+    });
+}
+
+(async () => {
+    const results = [];
+    for (const count of GAME_COUNTS) {
+        results.push(await measure("setTimeout", legacy, count));
+        global.gc?.();
+        results.push(await measure("wheel", wheel, count));
+        global.gc?.();
+    }
+    console.table(results);
+})();
@@ -0,0 +1,257 @@
+// اجرای چند هسته‌ای: پروسه‌ی اصلی یک proxy ساده است و به ازای هر هسته یک Server.js اجرا می‌کند.
+// درخواست‌های هر userId همیشه به یک worker می‌روند، پس وضعیت بازی (players) لازم نیست مشترک باشد.
+// جدول رده‌بندی از طریق IPC بین همه‌ی worker ها تکثیر می‌شود.
+// /metrics را خود پروسه‌ی اصلی جواب می‌دهد: متریک‌های همه‌ی worker ها با برچسب worker ادغام می‌شوند.
+require("dotenv").config();
+const cluster = require("cluster");
+const http = require("http");
+const os = require("os");
+const { LeaderboardIndex } = require("./leaderboard.js");
+const logger = require("./logger.js");
+
+const PORT = parseInt(process.env.PORT) || 10000;
+const WORKER_BASE_PORT = parseInt(process.env.WORKER_BASE_PORT) || PORT + 1;
+const WORKERS = parseInt(process.env.WORKERS) || os.availableParallelism?.() || os.cpus().length;
+
+const log = (message) => logger.info(message, { process: "cluster" });
+
+// FNV-1a برای نگاشت پایدار userId به worker
+function hashKey(key) {
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < key.length; i++) {
+        hash ^= key.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193);
+    }
+    return hash >>> 0;
+}
+
+// userId فقط از payload توکن خوانده می‌شود؛ امضای توکن را خود worker بررسی می‌کند
+function userIdFromRequest(req) {
+    const token = (req.headers["authorization"] || "").split(" ")[1];
+    const payload = token && token.split(".")[1];
+    if (!payload) return null;
+    try {
+        const userId = JSON.parse(Buffer.from(payload, "base64url").toString()).userId;
+        return userId === undefined ? null : String(userId);
+    } catch (e) {
+        return null;
+    }
+}
+
+const slots = new Array(WORKERS).fill(null); // slot -> cluster worker
+const leaderboard = new LeaderboardIndex(); // نسخه‌ی کامل برای worker های تازه
+let shuttingDown = false;
+let roundRobin = 0;
+
+function fork(slot) {
+    const worker = cluster.fork({
+        PORT: String(WORKER_BASE_PORT + slot),
+        CLUSTER_WORKER: "true",
+    });
+    slots[slot] = worker;
+
+    worker.on("message", (msg) => {
+        if (msg?.type === "ready") {
+            // worker تازه رده‌بندی فعلی را یکجا می‌گیرد
+            worker.send({
+                type: "leaderboard_snapshot",
+                rows: leaderboard.range(0, leaderboard.size),
+            });
+        } else if (msg?.type === "leaderboard") {
+            leaderboard.update(msg.key, msg.score, msg.data);
+            for (const other of slots) {
+                if (other && other !== worker && other.isConnected()) {
+                    other.send(msg);
+                }
+            }
+        }
+    });
+
+    worker.on("exit", (code, signal) => {
+        if (slots[slot] === worker) slots[slot] = null;
+        if (shuttingDown) return;
+        log(`Worker ${slot} exited (${signal || code}), restarting`);
+        fork(slot);
+    });
+}
+
+const agent = new http.Agent({ keepAlive: true, maxSockets: 256 });
+
+const METRICS_TIMEOUT = 2000;
+
+function scrapeWorker(slot) {
+    return new Promise((resolve) => {
+        const req = http.get(
+            {
+                host: "127.0.0.1",
+                port: WORKER_BASE_PORT + slot,
+                path: "/metrics",
+                agent,
+                timeout: METRICS_TIMEOUT,
+            },
+            (res) => {
+                let text = "";
+                res.setEncoding("utf8");
+                res.on("data", (chunk) => (text += chunk));
+                res.on("end", () => resolve(res.statusCode === 200 ? text : null));
+            }
+        );
+        req.on("timeout", () => req.destroy(new Error("timeout")));
+        req.on("error", () => resolve(null));
+    });
+}
+
+// برچسب worker به هر نمونه اضافه می‌شود: name{a="b"} 1 -> name{worker="0",a="b"} 1
+function addWorkerLabel(line, slot) {
+    const match = line.match(/^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})?( .*)$/);
+    if (!match) return null;
+    const labels = match[3] ? `worker="${slot}",${match[3]}` : `worker="${slot}"`;
+    return `${match[1]}{${labels}}${match[4]}`;
+}
+
+// نمونه‌های هر متریک در خروجی Prometheus باید پشت سر هم بیایند،
+// پس خروجی worker ها بر اساس نام متریک (خط HELP/TYPE) گروه‌بندی می‌شود
+async function renderClusterMetrics() {
+    const families = new Map(); // name -> { header: [], samples: [] }
+    const up = [];
+
+    const outputs = await Promise.all(slots.map((_, slot) => scrapeWorker(slot)));
+    outputs.forEach((text, slot) => {
+        up.push(`cluster_worker_up{worker="${slot}"} ${text === null ? 0 : 1}`);
+        if (text === null) return;
+
+        let family = null;
+        for (const line of text.split("\n")) {
+            if (!line) continue;
+            const comment = line.match(/^# (HELP|TYPE) (\S+)/);
+            if (comment) {
+                const name = comment[2];
+                if (!families.has(name)) families.set(name, { header: [], samples: [] });
+                family = families.get(name);
+                // HELP و TYPE فقط از اولین worker
+                if (!family.header.some((h) => h.startsWith(`# ${comment[1]} `))) {
+                    family.header.push(line);
+                }
+                continue;
+            }
+            const sample = addWorkerLabel(line, slot);
+            if (family && sample) family.samples.push(sample);
+        }
+    });
+
+    const lines = [
+        "# HELP cluster_worker_up Whether the worker answered the last /metrics scrape",
+        "# TYPE cluster_worker_up gauge",
+        ...up,
+    ];
+    for (const family of families.values()) lines.push(...family.header, ...family.samples);
+    return lines.join("\n") + "\n";
+}
+
+function serveMetrics(res) {
+    renderClusterMetrics().then(
+        (body) => {
+            res.writeHead(200, { "Content-Type": "text/plain; version=0.0.4" });
+            res.end(body);
+        },
+        (e) => {
+            res.writeHead(500, { "Content-Type": "text/plain" });
+            res.end(e.message);
+        }
+    );
+}
+
+function proxy(req, res) {
+    if (req.method === "GET" && req.url.split("?")[0] === "/metrics") {
+        serveMetrics(res);
+        return;
+    }
+
+    const userId = userIdFromRequest(req);
+    const slot =
+        userId !== null
+            ? hashKey(userId) % WORKERS
+            : roundRobin++ % WORKERS;
+
+    const upstream = http.request(
+        {
+            host: "127.0.0.1",
+            port: WORKER_BASE_PORT + slot,
+            method: req.method,
+            path: req.url,
+            headers: req.headers,
+            agent,
+        },
+        (upstreamRes) => {
+            res.writeHead(upstreamRes.statusCode, upstreamRes.headers);
+            upstreamRes.pipe(res);
+        }
+    );
+
+    upstream.on("error", (e) => {
+        if (!res.headersSent) {
+            res.writeHead(502, { "Content-Type": "application/json" });
+        }
+        res.end(JSON.stringify({ status: "error", message: "Worker unavailable" }));
+        log(`Proxy error on worker ${slot}: ${e.message}`);
+    });
+
+    req.pipe(upstream);
+}
+
+// پروسه‌ی اصلی: worker ها را اجرا می‌کند و proxy را روی PORT باز می‌کند
+function startPrimary() {
+    // worker ها همین فایل را اجرا می‌کنند، حتی وقتی پروسه‌ی اصلی از جای دیگری (مثل تست) شروع شده
+    cluster.setupPrimary({ exec: __filename });
+    for (let slot = 0; slot < WORKERS; slot++) fork(slot);
+
+    const server = http.createServer(proxy);
+    server.listen(PORT, () => {
+        log(`Proxy on port ${PORT}, ${WORKERS} workers from port ${WORKER_BASE_PORT}`);
+    });
+    return server;
+}
+
+// worker ها دوباره اجرا نمی‌شوند؛ وقتی همه بسته شدند resolve می‌شود
+function stopWorkers() {
+    shuttingDown = true;
+    return new Promise((resolve) => {
+        const check = () => {
+            if (slots.every((worker) => worker === null)) {
+                cluster.off("exit", check);
+                resolve();
+            }
+        };
+        cluster.on("exit", check);
+        for (const worker of slots) worker?.process.kill("SIGTERM");
+        check();
+    });
+}
+
+if (require.main === module) {
+    if (cluster.isPrimary) {
+        const server = startPrimary();
+
+        const shutdown = (signal) => {
+            log(`${signal} received, stopping workers`);
+            server.close();
+            stopWorkers().then(() => process.exit(0));
+        };
+
+        process.once("SIGTERM", shutdown);
+        process.once("SIGINT", shutdown);
+    } else {
+        require("./Server.js");
+    }
+}
+
+module.exports = {
+    WORKER_BASE_PORT,
+    addWorkerLabel,
+    hashKey,
+    renderClusterMetrics,
+    slots,
+    startPrimary,
+    stopWorkers,
+    userIdFromRequest,
+};
@@ -0,0 +1,214 @@
+// جدول رده‌بندی با skip list شاخص‌دار (مثل zset در Redis):
+// هر پیوند طول پرش (span) خود را نگه می‌دارد تا رتبه و صفحه‌بندی در O(log n) انجام شود.
+const MAX_LEVEL = 32;
+const P = 0.25;
+
+function randomLevel() {
+    let level = 1;
+    while (level < MAX_LEVEL && Math.random() < P) level += 1;
+    return level;
+}
+
+function createNode(level, key, score, seq, data) {
+    return {
+        key,
+        score,
+        seq,
+        data,
+        forward: new Array(level).fill(null),
+        span: new Array(level).fill(0),
+    };
+}
+
+// امتیاز بیشتر جلوتر است؛ در امتیاز برابر، کسی که زودتر رسیده جلوتر است
+function before(node, score, seq) {
+    return node.score > score || (node.score === score && node.seq < seq);
+}
+
+class LeaderboardIndex {
+    constructor() {
+        this.head = createNode(MAX_LEVEL, null, Infinity, -1, null);
+        this.level = 1;
+        this.length = 0;
+        this.nodes = new Map(); // key -> node
+        this.seq = 0;
+    }
+
+    get size() {
+        return this.length;
+    }
+
+    has(key) {
+        return this.nodes.has(key);
+    }
+
+    scoreOf(key) {
+        const node = this.nodes.get(key);
+        return node ? node.score : null;
+    }
+
+    // فقط وقتی امتیاز بالاتر رفته باشد جابه‌جا می‌شود؛ اطلاعات نمایشی همیشه به‌روز می‌شوند
+    update(key, score, data) {
+        const node = this.nodes.get(key);
+        if (node) {
+            if (data !== undefined) node.data = data;
+            if (score <= node.score) return false;
+            this._delete(node);
+            data = node.data;
+        }
+
+        this.nodes.set(key, this._insert(key, score, this.seq++, data));
+        return true;
+    }
+
+    remove(key) {
+        const node = this.nodes.get(key);
+        if (!node) return false;
+        this._delete(node);
+        this.nodes.delete(key);
+        return true;
+    }
+
+    // رتبه از ۱ شروع می‌شود
+    rank(key) {
+        const node = this.nodes.get(key);
+        if (!node) return null;
+
+        let rank = 0;
+        let x = this.head;
+        for (let i = this.level - 1; i >= 0; i--) {
+            while (x.forward[i] && before(x.forward[i], node.score, node.seq)) {
+                rank += x.span[i];
+                x = x.forward[i];
+            }
+        }
+        return rank + 1;
+    }
+
+    range(offset, limit) {
+        const rows = [];
+        if (offset >= this.length || limit <= 0) return rows;
+
+        // پرش به عنصر شماره offset با استفاده از span ها
+        let traversed = 0;
+        let x = this.head;
+        for (let i = this.level - 1; i >= 0; i--) {
+            while (x.forward[i] && traversed + x.span[i] <= offset) {
+                traversed += x.span[i];
+                x = x.forward[i];
+            }
+        }
+
+        x = x.forward[0];
+        while (x && rows.length < limit) {
+            rows.push({
+                key: x.key,
+                score: x.score,
+                rank: offset + rows.length + 1,
+                data: x.data,
+            });
+            x = x.forward[0];
+        }
+        return rows;
+    }
+
+    _insert(key, score, seq, data) {
+        const update = new Array(MAX_LEVEL);
+        const rank = new Array(MAX_LEVEL);
+
+        let x = this.head;
+        for (let i = this.level - 1; i >= 0; i--) {
+            rank[i] = i === this.level - 1 ? 0 : rank[i + 1];
+            while (x.forward[i] && before(x.forward[i], score, seq)) {
+                rank[i] += x.span[i];
+                x = x.forward[i];
+            }
+            update[i] = x;
+        }
+
+        const level = randomLevel();
+        if (level > this.level) {
+            for (let i = this.level; i < level; i++) {
+                rank[i] = 0;
+                update[i] = this.head;
+                update[i].span[i] = this.length;
+            }
+            this.level = level;
+        }
+
+        const node = createNode(level, key, score, seq, data);
+        for (let i = 0; i < level; i++) {
+            node.forward[i] = update[i].forward[i];
+            update[i].forward[i] = node;
+            node.span[i] = update[i].span[i] - (rank[0] - rank[i]);
+            update[i].span[i] = rank[0] - rank[i] + 1;
+        }
+        for (let i = level; i < this.level; i++) {
+            update[i].span[i] += 1;
+        }
+
+        this.length += 1;
+        return node;
+    }
+
+    _delete(node) {
+        const update = new Array(MAX_LEVEL);
+
+        let x = this.head;
+        for (let i = this.level - 1; i >= 0; i--) {
+            while (x.forward[i] && before(x.forward[i], node.score, node.seq)) {
+                x = x.forward[i];
+            }
+            update[i] = x;
+        }
+
+        for (let i = 0; i < this.level; i++) {
+            if (update[i].forward[i] === node) {
+                update[i].span[i] += node.span[i] - 1;
+                update[i].forward[i] = node.forward[i];
+            } else {
+                update[i].span[i] -= 1;
+            }
+        }
+
+        while (this.level > 1 && !this.head.forward[this.level - 1]) {
+            this.level -= 1;
+        }
+        this.length -= 1;
+    }
+}
+
+// پر کردن جدول از روی بیشترین امتیاز هر کاربر در جدول scores،
+// تا رتبه‌ها بعد از پاک شدن بازیکنان غیرفعال یا ری‌استارت سرور باقی بمانند
+async function loadFromScores(index, { Score, User }) {
+    const { fn, col } = Score.sequelize.constructor; // کلاس Sequelize
+
+    const best = await Score.findAll({
+        attributes: ["userTelegramId", [fn("MAX", col("score")), "top_score"]],
+        group: ["userTelegramId"],
+        order: [[fn("MAX", col("score")), "DESC"]],
+        raw: true,
+    });
+    if (best.length === 0) return 0;
+
+    const users = await User.findAll({
+        where: { telegramId: best.map((row) => row.userTelegramId) },
+        raw: true,
+    });
+    const byId = new Map(users.map((user) => [String(user.telegramId), user]));
+
+    for (const row of best) {
+        const user = byId.get(String(row.userTelegramId)) || {};
+        index.update(String(row.userTelegramId), Number(row.top_score), {
+            player_id: String(row.userTelegramId),
+            username: user.username,
+            first_name: user.firstName,
+        });
+    }
+    return best.length;
+}
+
+module.exports = {
+    LeaderboardIndex,
+    loadFromScores,
+};
@@ -0,0 +1,182 @@
+// لاگر ساخت‌یافته (JSON در هر خط) با بافر و نوشتن دسته‌ای غیرهمگام.
+// تنظیمات از env:
+//   LOG_LEVEL=debug|info|warn|error     (پیش‌فرض info)
+//   LOG_FILE=game_server.log            (پیش‌فرض stdout)
+//   LOG_SAMPLE=/api/answer=0.01,/api/start=0.1   نرخ نمونه‌برداری لاگ‌های هر route
+//   LOG_BUFFER=10000                    حداکثر خط در بافر؛ بیشتر از آن دور ریخته و شمرده می‌شود
+// رکوردهای audit (مثل seed هر بازی برای بازپخش ضدتقلب) با LOG_LEVEL و LOG_SAMPLE حذف نمی‌شوند.
+const fs = require("fs");
+const path = require("path");
+
+const LEVELS = { debug: 10, info: 20, warn: 30, error: 40 };
+
+function parseSampling(value) {
+    const sampling = {};
+    for (const pair of (value || "").split(",")) {
+        const [route, rate] = pair.split("=");
+        if (route && rate !== undefined) sampling[route.trim()] = Number(rate);
+    }
+    return sampling;
+}
+
+class Logger {
+    constructor({
+        level = "info",
+        file = null,
+        sampling = {},
+        maxBuffer = 10000,
+        flushInterval = 100,
+        flushAt = 1000, // با رسیدن بافر به این اندازه، در تیک بعدی نوشته می‌شود
+    } = {}) {
+        this.level = LEVELS[level] ?? LEVELS.info;
+        this.sampling = sampling;
+        this.maxBuffer = maxBuffer;
+        this.flushAt = flushAt;
+        // فایل مستقیم با fs.write روی fd نوشته می‌شود تا هیچ خطی در صف داخلی WriteStream نماند
+        this.fd = file ? fs.openSync(path.resolve(__dirname, file), "a") : null;
+        this.stream = file ? null : process.stdout;
+
+        this.buffer = [];
+        this.writing = false; // هر بار فقط یک نوشتن در جریان است
+        this.idle = []; // resolve های منتظر drain
+        this.flushScheduled = false;
+        this.counters = { written: 0, dropped: 0, failed: 0, sampled_out: 0, filtered: 0 };
+
+        this.interval = setInterval(() => this.flush(), flushInterval);
+        this.interval.unref?.();
+        process.on("exit", () => this.flushSync());
+    }
+
+    debug(message, fields) {
+        this.log("debug", message, fields);
+    }
+
+    info(message, fields) {
+        this.log("info", message, fields);
+    }
+
+    warn(message, fields) {
+        this.log("warn", message, fields);
+    }
+
+    error(message, fields) {
+        this.log("error", message, fields);
+    }
+
+    // رکوردی که نباید از دست برود؛ در سطح info و با audit: true نوشته می‌شود
+    audit(message, fields) {
+        this.log("info", message, { ...fields, audit: true });
+    }
+
+    log(level, message, fields) {
+        const audit = fields?.audit === true;
+        if (LEVELS[level] < this.level && !audit) {
+            this.counters.filtered += 1;
+            return;
+        }
+
+        // فقط خطاها و رکوردهای audit از نمونه‌برداری معاف‌اند
+        const rate = fields?.route !== undefined ? this.sampling[fields.route] : undefined;
+        if (rate !== undefined && level !== "error" && !audit && Math.random() >= rate) {
+            this.counters.sampled_out += 1;
+            return;
+        }
+
+        if (this.buffer.length >= this.maxBuffer) {
+            this.counters.dropped += 1;
+            return;
+        }
+
+        // زمان به صورت عدد ذخیره می‌شود؛ ساختن رشته‌ی ISO در هر فراخوانی لازم نیست
+        this.buffer.push(
+            JSON.stringify({ time: Date.now(), level, msg: message, ...fields })
+        );
+
+        if (this.buffer.length >= this.flushAt && !this.flushScheduled) {
+            this.flushScheduled = true;
+            setImmediate(() => {
+                this.flushScheduled = false;
+                this.flush();
+            });
+        }
+    }
+
+    // اگر مقصد کند باشد، تا پایان نوشتن قبلی صبر می‌کنیم و بافر پر می‌شود (و بعد drop)
+    flush() {
+        if (this.buffer.length === 0 || this.writing) return;
+
+        const lines = this.buffer;
+        this.buffer = [];
+        this.writing = true;
+
+        const data = lines.join("\n") + "\n";
+        const done = (err) => this._written(lines.length, err);
+        if (this.fd === null) this.stream.write(data, done);
+        else this._writeFile(Buffer.from(data), 0, done);
+    }
+
+    // fs.write ممکن است بخشی از داده را بنویسد؛ بقیه تا آخر فرستاده می‌شود
+    _writeFile(data, offset, done) {
+        fs.write(this.fd, data, offset, data.length - offset, null, (err, bytes) => {
+            if (err) return done(err);
+            if (offset + bytes < data.length) return this._writeFile(data, offset + bytes, done);
+            done(null);
+        });
+    }
+
+    // خطوط فقط بعد از تأیید نوشتن شمرده می‌شوند
+    _written(count, err) {
+        this.writing = false;
+        if (err) this.counters.failed += count;
+        else this.counters.written += count;
+
+        if (this.buffer.length === 0) {
+            for (const resolve of this.idle.splice(0)) resolve();
+        } else if (this.buffer.length >= this.flushAt || this.idle.length > 0) {
+            this.flush();
+        }
+    }
+
+    // برای خاموش شدن مرتب: تا نوشته شدن بافر و نوشتن در جریان صبر می‌کند
+    async drain({ timeout = 5000 } = {}) {
+        const deadline = Date.now() + timeout;
+        while ((this.buffer.length > 0 || this.writing) && Date.now() < deadline) {
+            this.flush();
+            await new Promise((resolve) => {
+                const timer = setTimeout(resolve, deadline - Date.now());
+                this.idle.push(() => {
+                    clearTimeout(timer);
+                    resolve();
+                });
+            });
+        }
+        return this.buffer.length === 0 && !this.writing;
+    }
+
+    // برای خروج ناگهانی پروسه؛ فقط بافر همگام نوشته می‌شود.
+    // نوشتنی که در جریان است تضمینی ندارد، پس خاموش شدن مرتب باید اول drain را صبر کند.
+    flushSync() {
+        if (this.buffer.length === 0) return;
+        const lines = this.buffer;
+        this.buffer = [];
+        try {
+            fs.writeSync(this.fd ?? 1, lines.join("\n") + "\n");
+            this.counters.written += lines.length;
+        } catch (e) {
+            // پروسه در حال خروج است؛ کاری نمی‌شود کرد
+            this.counters.failed += lines.length;
+        }
+    }
+
+    stats() {
+        return { ...this.counters, buffered: this.buffer.length };
+    }
+}
+
+module.exports = new Logger({
+    level: process.env.LOG_LEVEL,
+    file: process.env.LOG_FILE,
+    sampling: parseSampling(process.env.LOG_SAMPLE),
+    maxBuffer: parseInt(process.env.LOG_BUFFER) || 10000,
+});
+module.exports.Logger = Logger;
@@ -5,49 +5,132 @@ const OPS = {
     "÷": (a, b) => Math.floor(a / b), // تقسیم صحیح
 };
 
-function _pickNumbers(op) {
+// کد عملگرها اندیس همین آرایه است
+const OP_SYMBOLS = Object.keys(OPS);
+const OP_FNS = OP_SYMBOLS.map((op) => OPS[op]);
+const OP_ADD = 0;
+const OP_SUB = 1;
+const OP_MUL = 2;
+const OP_DIV = 3;
+
+// mulberry32: PRNG سریع و قابل تکرار با حالت ۳۲ بیتی
+function createRandom(seed) {
+    let state = seed >>> 0;
+    const rand = () => {
+        state = (state + 0x6d2b79f5) | 0;
+        let t = Math.imul(state ^ (state >>> 15), 1 | state);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+    rand.state = () => state >>> 0;
+    return rand;
+}
+
+function randomSeed() {
+    return Math.floor(Math.random() * 4294967296) >>> 0;
+}
+
+function createStore(n) {
+    return {
+        a: new Int32Array(n),
+        b: new Int32Array(n),
+        op: new Uint8Array(n),
+        shown: new Int32Array(n), // نتیجه‌ای که به کاربر نشان داده می‌شود
+        truth: new Uint8Array(n), // ۱ اگر نتیجه درست باشد
+    };
+}
+
+// difficulty باید عدد مثبت باشد؛ صفر یا منفی بازه‌ها را خالی یا منفی می‌کند
+function checkDifficulty(difficulty) {
+    if (!(difficulty > 0) || !Number.isFinite(difficulty)) {
+        throw new RangeError(`difficulty must be a positive number, got ${difficulty}`);
+    }
+}
+
+// یک مسئله مستقیم در خانه‌ی i آرایه‌ها نوشته می‌شود (بدون ساختن آرایه یا رشته).
+// difficulty طول بازه‌ی اعداد را ضرب می‌کند؛ بازه‌های داخل پرانتز برای difficulty = 1 است.
+// هر بازه حداقل یک عدد دارد تا difficulty خیلی کوچک همه‌ی مسئله‌ها را یکی نکند.
+function fillProblem(store, i, rand, difficulty) {
+    const op = Math.floor(rand() * OP_SYMBOLS.length);
     let a, b;
-    if (op === "×" || op === "÷") {
-        a = Math.floor(Math.random() * 11) + 2; // 2-12
-        b = Math.floor(Math.random() * 11) + 2; // 2-12
-        if (op === "÷") { // تضمین بخش‌پذیری
+    if (op === OP_MUL || op === OP_DIV) {
+        const span = Math.max(1, Math.round(11 * difficulty));
+        a = Math.floor(rand() * span) + 2; // 2 تا span + 1 (2-12)
+        b = Math.floor(rand() * span) + 2; // 2 تا span + 1 (2-12)
+        if (op === OP_DIV) { // تضمین بخش‌پذیری
             a = a * b;
         }
     } else {
-        a = Math.floor(Math.random() * 101) + 20; // 20-120
-        b = Math.floor(Math.random() * 120) + 1; // 1-120
+        const spanA = Math.max(1, Math.round(101 * difficulty));
+        const spanB = Math.max(1, Math.round(120 * difficulty));
+        a = Math.floor(rand() * spanA) + 20; // 20 تا spanA + 19 (20-120)
+        b = Math.floor(rand() * spanB) + 1; // 1 تا spanB (1-120)
     }
-    if (op === "-" && b > a) { // جلوگیری از منفی
-        [a, b] = [b, a];
+    if (op === OP_SUB && b > a) { // جلوگیری از منفی
+        const tmp = a;
+        a = b;
+        b = tmp;
     }
-    return [a, b];
-}
-
-function generate() {
-    const ops = Object.keys(OPS);
-    const op = ops[Math.floor(Math.random() * ops.length)];
-    const [a, b] = _pickNumbers(op);
-    const correct = OPS[op](a, b);
+    const correct = OP_FNS[op](a, b);
 
     // تصمیم بگیریم سؤال درست یا غلط باشد
     let result, is_correct;
-    if (Math.random() < 0.6) { // 60% سؤال درست
+    if (rand() < 0.6) { // 60% سؤال درست
         result = correct;
-        is_correct = true;
+        is_correct = 1;
     } else { // 40% سؤال غلط با خطای کوچک
-        const delta = Math.floor(Math.random() * Math.max(3, Math.abs(correct) / 4)) + 1;
-        result = correct + (Math.random() < 0.5 ? -delta : delta);
-        if (op === "÷" && result === 0) { // دوری از صفر
+        const delta = Math.floor(rand() * Math.max(3, Math.abs(correct) / 4)) + 1;
+        result = correct + (rand() < 0.5 ? -delta : delta);
+        if (op === OP_DIV && result === 0) { // دوری از صفر
             result += 1;
         }
-        is_correct = false;
+        is_correct = 0;
+    }
+
+    store.a[i] = a;
+    store.b[i] = b;
+    store.op[i] = op;
+    store.shown[i] = result;
+    store.truth[i] = is_correct;
+}
+
+// صورت سؤال را همیشه «نتیجه = عبارت» برگردانیم
+function render(store, i) {
+    return `${store.shown[i]} = ${store.a[i]} ${OP_SYMBOLS[store.op[i]]} ${store.b[i]}`;
+}
+
+// n مسئله با seed مشخص؛ با همان seed همیشه همان دنباله ساخته می‌شود.
+// next_seed ادامه‌ی همان دنباله است: generateBatch(n, {seed}) + generateBatch(m, {seed: next_seed})
+// همان generateBatch(n + m, {seed}) است (برای بازبینی بازی‌ها در ضد تقلب).
+function generateBatch(n, { seed = randomSeed(), difficulty = 1 } = {}) {
+    checkDifficulty(difficulty);
+    const rand = createRandom(seed);
+    const batch = createStore(n);
+    for (let i = 0; i < n; i++) {
+        fillProblem(batch, i, rand, difficulty);
     }
+    batch.length = n;
+    batch.seed = seed >>> 0;
+    batch.next_seed = rand.state();
+    return batch;
+}
+
+// رابط قدیمی ماژول: یک مسئله‌ی تکی { problem, is_correct }.
+// Server.js از generateBatch استفاده می‌کند؛ این فقط برای سازگاری نگه داشته شده است.
+// یک store یک‌خانه‌ای و یک PRNG مشترک دوباره استفاده می‌شوند تا هر فراخوانی چیزی جز رشته نسازد.
+const single = createStore(1);
+const singleRand = createRandom(randomSeed());
 
-    // صورت سؤال را همیشه «نتیجه = عبارت» برگردانیم
-    const problem = `${result} = ${a} ${op} ${b}`;
-    return { problem, is_correct };
+function generate({ difficulty = 1 } = {}) {
+    checkDifficulty(difficulty);
+    fillProblem(single, 0, singleRand, difficulty);
+    return { problem: render(single, 0), is_correct: single.truth[0] === 1 };
 }
 
 module.exports = {
-    generate
+    OP_SYMBOLS,
+    generate,
+    generateBatch,
+    randomSeed,
+    render,
 };
@@ -0,0 +1,148 @@
+// متریک‌ها با فرمت متنی Prometheus.
+// سطل‌های histogram از قبل ساخته می‌شوند و observe هیچ شیئی نمی‌سازد،
+// پس می‌شود زمان‌سنجی را همیشه روشن گذاشت.
+const DEFAULT_BUCKETS = [
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+];
+
+function formatLabels(labels) {
+    const keys = Object.keys(labels);
+    if (keys.length === 0) return "";
+    const escape = (v) => String(v).replace(/\\/g, "\\\\").replace(/"/g, '\\"').replace(/\n/g, "\\n");
+    return `{${keys.map((k) => `${k}="${escape(labels[k])}"`).join(",")}}`;
+}
+
+class HistogramSeries {
+    constructor(buckets, labels) {
+        this.buckets = buckets;
+        this.labels = labels;
+        this.counts = new Float64Array(buckets.length + 1); // آخری: +Inf
+        this.sum = 0;
+        this.count = 0;
+    }
+
+    observe(value) {
+        let i = 0;
+        while (i < this.buckets.length && value > this.buckets[i]) i++;
+        this.counts[i] += 1;
+        this.sum += value;
+        this.count += 1;
+    }
+}
+
+class Histogram {
+    constructor(name, help, { buckets = DEFAULT_BUCKETS, labelName = null } = {}) {
+        this.name = name;
+        this.help = help;
+        this.bucketList = buckets;
+        this.labelName = labelName;
+        this.series = new Map(); // مقدار برچسب -> سری
+        this.root = labelName ? null : this.labels();
+    }
+
+    // سری هر مقدار برچسب فقط یک بار ساخته می‌شود
+    labels(value) {
+        let series = this.series.get(value);
+        if (!series) {
+            series = new HistogramSeries(
+                this.bucketList,
+                this.labelName ? { [this.labelName]: value } : {}
+            );
+            this.series.set(value, series);
+        }
+        return series;
+    }
+
+    observe(value) {
+        this.root.observe(value);
+    }
+
+    render() {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+        for (const series of this.series.values()) {
+            let cumulative = 0;
+            for (let i = 0; i <= this.bucketList.length; i++) {
+                cumulative += series.counts[i];
+                const le = i < this.bucketList.length ? this.bucketList[i] : "+Inf";
+                lines.push(`${this.name}_bucket${formatLabels({ ...series.labels, le })} ${cumulative}`);
+            }
+            const labels = formatLabels(series.labels);
+            lines.push(`${this.name}_sum${labels} ${series.sum}`);
+            lines.push(`${this.name}_count${labels} ${series.count}`);
+        }
+        return lines.join("\n");
+    }
+}
+
+class Counter {
+    constructor(name, help) {
+        this.name = name;
+        this.help = help;
+        this.value = 0;
+    }
+
+    inc(value = 1) {
+        this.value += value;
+    }
+
+    render() {
+        return `# HELP ${this.name} ${this.help}\n# TYPE ${this.name} counter\n${this.name} ${this.value}`;
+    }
+}
+
+// مقدار gauge هنگام scrape از collect خوانده می‌شود؛
+// collect یک عدد یا آرایه‌ای از [labels, value] برمی‌گرداند.
+// برای شمارنده‌هایی که جای دیگری نگه داشته می‌شوند type را counter بگذارید.
+class Gauge {
+    constructor(name, help, collect, { type = "gauge" } = {}) {
+        this.name = name;
+        this.help = help;
+        this.collect = collect;
+        this.type = type;
+    }
+
+    render() {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${this.type}`];
+        const value = this.collect();
+        if (Array.isArray(value)) {
+            for (const [labels, v] of value) lines.push(`${this.name}${formatLabels(labels)} ${v}`);
+        } else {
+            lines.push(`${this.name} ${value}`);
+        }
+        return lines.join("\n");
+    }
+}
+
+class Registry {
+    constructor() {
+        this.metrics = [];
+    }
+
+    histogram(name, help, options) {
+        return this.add(new Histogram(name, help, options));
+    }
+
+    counter(name, help) {
+        return this.add(new Counter(name, help));
+    }
+
+    gauge(name, help, collect, options) {
+        return this.add(new Gauge(name, help, collect, options));
+    }
+
+    add(metric) {
+        this.metrics.push(metric);
+        return metric;
+    }
+
+    render() {
+        return this.metrics.map((metric) => metric.render()).join("\n") + "\n";
+    }
+}
+
+module.exports = {
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+};
@@ -0,0 +1,189 @@
+// صف write-behind برای ذخیره‌ی امتیازها و کاربران در دیتابیس:
+// به جای یک INSERT برای هر بازی، رکوردها جمع می‌شوند و دسته‌ای با bulkCreate نوشته می‌شوند.
+// صف محدود است: اگر دیتابیس مدت زیادی در دسترس نباشد و صف به maxQueue برسد،
+// امتیاز بازی‌های تمام‌شده دور ریخته می‌شود (از دست می‌رود) و در metrics.dropped شمرده می‌شود.
+class ScoreWriter {
+    constructor(
+        { User, Score },
+        {
+            batchSize = 500, // حداکثر رکورد در هر flush
+            flushInterval = 1000, // حداکثر زمان ماندن رکورد در صف (ms)
+            maxQueue = 20000, // بعد از این، امتیازهای جدید دور ریخته می‌شوند
+            logger = console,
+        } = {}
+    ) {
+        this.User = User;
+        this.Score = Score;
+        this.batchSize = batchSize;
+        this.flushInterval = flushInterval;
+        this.maxQueue = maxQueue;
+        this.logger = logger;
+
+        this.users = new Map(); // telegramId -> آخرین اطلاعات کاربر
+        this.scores = [];
+        this.flushing = null;
+        this.interval = null;
+        this.closed = false;
+        this.dropping = false; // برای اینکه شروع دور ریختن فقط یک بار لاگ شود
+
+        this.metrics = {
+            flushes: 0,
+            failed_flushes: 0,
+            scores_written: 0,
+            users_written: 0,
+            dropped: 0,
+            last_flush_ms: 0,
+            max_flush_ms: 0,
+            total_flush_ms: 0,
+        };
+    }
+
+    get depth() {
+        return this.scores.length + this.users.size;
+    }
+
+    start() {
+        if (this.interval) return;
+        this.interval = setInterval(() => this.flush(), this.flushInterval);
+        this.interval.unref?.();
+    }
+
+    enqueueUser({ telegramId, username, firstName, lastName }) {
+        if (this.closed || !telegramId) return false;
+
+        // کاربران تکراری ادغام می‌شوند، پس این صف به تعداد کاربران فعال محدود است
+        this.users.set(String(telegramId), {
+            telegramId,
+            username,
+            firstName: firstName || "",
+            lastName,
+        });
+        this._maybeFlush();
+        return true;
+    }
+
+    enqueueScore(telegramId, score) {
+        if (this.closed || !telegramId) return false;
+
+        if (this.scores.length >= this.maxQueue) {
+            this._drop(1);
+            return false;
+        }
+
+        this.dropping = false;
+        this.scores.push({ userTelegramId: telegramId, score });
+        this._maybeFlush();
+        return true;
+    }
+
+    // فقط یک flush در هر لحظه؛ فراخوانی‌های هم‌زمان منتظر همان می‌مانند
+    flush() {
+        if (!this.flushing) {
+            this.flushing = this._flush().then((ok) => {
+                this.flushing = null;
+                // اگر در این فاصله صف دوباره پر شده، بلافاصله دسته‌ی بعدی
+                if (ok && !this.closed) this._maybeFlush();
+            });
+        }
+        return this.flushing;
+    }
+
+    // برای خاموش شدن: صف بسته می‌شود و تا خالی شدن flush ادامه پیدا می‌کند.
+    // flush ناموفق با تأخیر نمایی دوباره امتحان می‌شود تا قطعی کوتاه دیتابیس
+    // کل صف را از بین نبرد؛ حداکثر تا timeout میلی‌ثانیه.
+    async drain({ timeout = 10000, minDelay = 100, maxDelay = 2000 } = {}) {
+        this.closed = true;
+        clearInterval(this.interval);
+        this.interval = null;
+
+        const deadline = Date.now() + timeout;
+        let delay = minDelay;
+        while (this.depth > 0) {
+            const before = this.depth;
+            await this.flush();
+            if (this.depth < before) {
+                delay = minDelay;
+                continue;
+            }
+
+            const remaining = deadline - Date.now();
+            if (remaining <= 0) break;
+            await new Promise((resolve) => setTimeout(resolve, Math.min(delay, remaining)));
+            delay = Math.min(delay * 2, maxDelay);
+        }
+
+        if (this.depth > 0) {
+            this.logger.error(`Score writer drained with ${this.depth} records left`);
+        }
+    }
+
+    stats() {
+        const { flushes, total_flush_ms } = this.metrics;
+        return {
+            ...this.metrics,
+            queue_depth: this.depth,
+            avg_flush_ms: flushes ? total_flush_ms / flushes : 0,
+        };
+    }
+
+    _drop(count) {
+        if (count <= 0) return;
+        if (!this.dropping) {
+            this.dropping = true;
+            this.logger.warn(
+                `Score queue full (${this.maxQueue}), dropping finished-game scores`
+            );
+        }
+        this.metrics.dropped += count;
+    }
+
+    _maybeFlush() {
+        if (this.depth >= this.batchSize) this.flush();
+    }
+
+    async _flush() {
+        if (this.depth === 0) return true;
+
+        const users = [...this.users.values()].slice(0, this.batchSize);
+        const scores = this.scores.splice(0, this.batchSize);
+        for (const user of users) this.users.delete(String(user.telegramId));
+
+        const started = process.hrtime.bigint();
+        try {
+            // اول کاربران، چون scores به users کلید خارجی دارد
+            if (users.length > 0) {
+                await this.User.bulkCreate(users, {
+                    updateOnDuplicate: ["username", "firstName", "lastName", "updatedAt"],
+                });
+            }
+            if (scores.length > 0) {
+                await this.Score.bulkCreate(scores);
+            }
+
+            this.metrics.users_written += users.length;
+            this.metrics.scores_written += scores.length;
+            return true;
+        } catch (e) {
+            this.metrics.failed_flushes += 1;
+            this.logger.error(`Score writer flush error: ${e.message}`);
+
+            // برگرداندن به صف برای تلاش بعدی (اطلاعات جدیدتر کاربر حفظ می‌شود)
+            for (const user of users) {
+                const key = String(user.telegramId);
+                if (!this.users.has(key)) this.users.set(key, user);
+            }
+            const room = this.maxQueue - this.scores.length;
+            this._drop(scores.length - Math.max(0, room));
+            this.scores.unshift(...scores.slice(0, Math.max(0, room)));
+            return false;
+        } finally {
+            const elapsed = Number(process.hrtime.bigint() - started) / 1e6;
+            this.metrics.flushes += 1;
+            this.metrics.last_flush_ms = elapsed;
+            this.metrics.total_flush_ms += elapsed;
+            this.metrics.max_flush_ms = Math.max(this.metrics.max_flush_ms, elapsed);
+        }
+    }
+}
+
+module.exports = ScoreWriter;
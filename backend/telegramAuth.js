@@ -1,9 +1,9 @@
 
 import { validate } from "@tma.js/init-data-node";
+import logger from "./logger.js";
 
 export default function validateTelegramData(rawInitData, botToken) {
   try {
-    console.log("polllllll");
     // 1. اعتبارسنجی داده‌ها با استفاده از کتابخانه
     validate(rawInitData, botToken); // پارامتر اول باید رشته خام باشد
 
@@ -14,13 +14,10 @@ export default function validateTelegramData(rawInitData, botToken) {
     // 3. تبدیل رشته JSON به شیء JavaScript
     const userData = JSON.parse(userJson);
 
-    console.log(userData);
-
-
     // 4. بازگرداندن شیء کاربر
     return  userData;
   } catch (error) {
-    console.error('Telegram data validation failed:', error);
+    logger.error('Telegram data validation failed', { error: error.message });
     throw new Error('Authentication failed: Invalid Telegram data');
   }
 }
\ No newline at end of file
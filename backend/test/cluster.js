@@ -0,0 +1,239 @@
+// تست یکپارچه‌ی cluster_server.js با دو worker واقعی (Server.js):
+// مسیریابی پایدار userId، تکثیر رده‌بندی با IPC، رسیدن leaderboard_snapshot به worker
+// دوباره‌اجراشده و ادغام خانواده‌های /metrics در پروسه‌ی اصلی.
+// اجرا: node test/cluster.js   (پورت‌ها از CLUSTER_TEST_PORT، پیش‌فرض 18500 تا 18502)
+const PORT = Number(process.env.CLUSTER_TEST_PORT) || 18500;
+Object.assign(process.env, {
+    PORT: String(PORT),
+    WORKER_BASE_PORT: String(PORT + 1),
+    WORKERS: "2",
+    JWT_SECRET: "cluster-test-secret",
+    USE_DB: "false",
+    LOG_FILE: "",
+    LOG_LEVEL: "warn",
+});
+
+const assert = require("assert");
+const http = require("http");
+const jwt = require("jsonwebtoken");
+const {
+    addWorkerLabel,
+    hashKey,
+    renderClusterMetrics,
+    slots,
+    startPrimary,
+    stopWorkers,
+    userIdFromRequest,
+} = require("../cluster_server.js");
+
+const WORKER_PORTS = [PORT + 1, PORT + 2];
+
+function tokenFor(userId) {
+    return jwt.sign(
+        { userId, firstName: `user${userId}`, username: `user${userId}` },
+        process.env.JWT_SECRET
+    );
+}
+
+// اولین userId که به worker مورد نظر می‌رسد
+function userForSlot(slot) {
+    for (let id = 1000; ; id++) {
+        if (hashKey(String(id)) % 2 === slot) return id;
+    }
+}
+
+function request(port, method, path, { token, body } = {}) {
+    return new Promise((resolve, reject) => {
+        const data = body === undefined ? null : JSON.stringify(body);
+        const req = http.request(
+            {
+                host: "127.0.0.1",
+                port,
+                method,
+                path,
+                headers: {
+                    ...(token && { Authorization: `Bearer ${token}` }),
+                    ...(data && { "Content-Type": "application/json" }),
+                },
+            },
+            (res) => {
+                let text = "";
+                res.setEncoding("utf8");
+                res.on("data", (chunk) => (text += chunk));
+                res.on("end", () => {
+                    let parsed = text;
+                    try {
+                        parsed = JSON.parse(text);
+                    } catch (e) {
+                        // /metrics متن ساده است
+                    }
+                    resolve({ status: res.statusCode, body: parsed });
+                });
+            }
+        );
+        req.on("error", reject);
+        req.end(data);
+    });
+}
+
+async function waitFor(what, check, timeout = 10000) {
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+        try {
+            if (await check()) return;
+        } catch (e) {
+            // worker هنوز بالا نیامده
+        }
+        await new Promise((resolve) => setTimeout(resolve, 50));
+    }
+    throw new Error(`timed out waiting for ${what}`);
+}
+
+const workerUp = (port) =>
+    request(port, "GET", "/api/leaderboard").then((res) => res.status === 200);
+
+function checkRouting() {
+    const req = (authorization) => ({ headers: authorization ? { authorization } : {} });
+    assert.strictEqual(userIdFromRequest(req(`Bearer ${tokenFor(42)}`)), "42");
+    assert.strictEqual(userIdFromRequest(req(`Bearer ${tokenFor("abc")}`)), "abc");
+    assert.strictEqual(userIdFromRequest(req()), null, "no header");
+    assert.strictEqual(userIdFromRequest(req("Bearer nodots")), null, "no payload");
+    assert.strictEqual(userIdFromRequest(req("Bearer a.%%%.c")), null, "bad payload");
+    const noUser = `a.${Buffer.from(JSON.stringify({ name: "x" })).toString("base64url")}.c`;
+    assert.strictEqual(userIdFromRequest(req(`Bearer ${noUser}`)), null, "no userId");
+
+    // نگاشت فقط به userId بستگی دارد و هر دو worker سهم دارند
+    const counts = [0, 0];
+    for (let id = 0; id < 1000; id++) {
+        counts[hashKey(String(id)) % 2] += 1;
+    }
+    assert.ok(counts[0] > 350 && counts[1] > 350, `skewed routing ${counts}`);
+    assert.strictEqual(hashKey("12345"), 1136836824, "FNV-1a value changed");
+
+    assert.strictEqual(addWorkerLabel("up 1", 0), 'up{worker="0"} 1');
+    assert.strictEqual(addWorkerLabel('x{a="b"} 2', 1), 'x{worker="1",a="b"} 2');
+    assert.strictEqual(addWorkerLabel("# comment", 1), null);
+}
+
+// تا وقتی امتیاز کاربر بالا نرفته بازی می‌کند (بازی‌های تمام‌شده دوباره شروع می‌شوند)
+async function playUntilScore(token, target) {
+    let best = 0;
+    for (let i = 0; i < 500 && best < target; i++) {
+        const { body } = await request(PORT, "POST", "/api/answer", {
+            token,
+            body: { answer: true },
+        });
+        if (body.status === "continue") best = Math.max(best, body.score);
+        else {
+            assert.strictEqual(body.status, "game_over", JSON.stringify(body));
+            await request(PORT, "POST", "/api/start", { token });
+        }
+    }
+    assert.ok(best >= target, "could not reach target score");
+    return best;
+}
+
+async function leaderboardEntry(port, token) {
+    const { body } = await request(port, "GET", "/api/leaderboard/me", { token });
+    return body;
+}
+
+async function checkCluster() {
+    const users = [userForSlot(0), userForSlot(1)];
+    const tokens = users.map(tokenFor);
+
+    // هر کاربر از طریق proxy فقط روی worker خودش بازی دارد
+    for (let slot = 0; slot < 2; slot++) {
+        const start = await request(PORT, "POST", "/api/start", { token: tokens[slot] });
+        assert.strictEqual(start.status, 200, JSON.stringify(start.body));
+        for (let i = 0; i < 5; i++) {
+            const { body } = await request(PORT, "POST", "/api/answer", {
+                token: tokens[slot],
+                body: { answer: i % 2 === 0 },
+            });
+            assert.notStrictEqual(body.status, "error", `answer ${i}: ${JSON.stringify(body)}`);
+            if (body.status === "game_over") break;
+        }
+
+        const own = await request(WORKER_PORTS[slot], "POST", "/api/answer", {
+            token: tokens[slot],
+            body: { answer: true },
+        });
+        assert.notStrictEqual(own.body.status, "error", "player missing on its own worker");
+        const other = await request(WORKER_PORTS[1 - slot], "POST", "/api/answer", {
+            token: tokens[slot],
+            body: { answer: true },
+        });
+        assert.strictEqual(other.body.status, "error", "player found on the other worker");
+    }
+
+    // امتیاز کاربر worker 0 با IPC به worker 1 می‌رسد
+    await request(PORT, "POST", "/api/start", { token: tokens[0] });
+    await playUntilScore(tokens[0], 2);
+    const { score } = await leaderboardEntry(WORKER_PORTS[0], tokens[0]);
+    const replicated = async () => {
+        const entry = await leaderboardEntry(WORKER_PORTS[1], tokens[0]);
+        return entry.rank !== null && entry.score === score;
+    };
+    await waitFor("leaderboard replication", replicated);
+
+    // worker 1 بعد از کشته شدن دوباره اجرا می‌شود و رده‌بندی را با snapshot می‌گیرد
+    const old = slots[1];
+    old.process.kill("SIGKILL");
+    await waitFor("worker restart", async () => slots[1] && slots[1] !== old && workerUp(WORKER_PORTS[1]));
+    await waitFor("leaderboard snapshot", replicated);
+
+    // /metrics: هر خانواده یک بار، با نمونه‌های هر دو worker پشت سر هم
+    const text = await renderClusterMetrics();
+    const lines = text.trim().split("\n");
+    assert.ok(lines.includes('cluster_worker_up{worker="0"} 1'), "worker 0 up");
+    assert.ok(lines.includes('cluster_worker_up{worker="1"} 1'), "worker 1 up");
+
+    const types = new Map();
+    const workersByFamily = new Map();
+    let family = null;
+    for (const line of lines) {
+        const type = line.match(/^# TYPE (\S+)/);
+        if (type) {
+            assert.ok(!types.has(type[1]), `${type[1]} TYPE repeated`);
+            types.set(type[1], true);
+            family = type[1];
+            workersByFamily.set(family, new Set());
+            continue;
+        }
+        if (line.startsWith("#")) continue;
+        const sample = line.match(/^([a-zA-Z_:][a-zA-Z0-9_:]*)\{worker="(\d+)"/);
+        assert.ok(sample, `sample without worker label: ${line}`);
+        assert.ok(
+            sample[1] === family || sample[1].startsWith(`${family}_`),
+            `${sample[1]} outside its family (${family})`
+        );
+        workersByFamily.get(family).add(sample[2]);
+    }
+    for (const name of ["game_players", "nodejs_memory_bytes", "game_leaderboard_size"]) {
+        assert.deepStrictEqual([...workersByFamily.get(name)].sort(), ["0", "1"], name);
+    }
+
+    const proxied = await request(PORT, "GET", "/metrics");
+    assert.strictEqual(proxied.status, 200);
+    assert.ok(proxied.body.includes("# TYPE cluster_worker_up gauge"));
+}
+
+(async () => {
+    let server = null;
+    try {
+        checkRouting();
+        server = startPrimary();
+        await Promise.all(WORKER_PORTS.map((port) => waitFor(`worker on ${port}`, () => workerUp(port))));
+        await checkCluster();
+        console.log("cluster: ok");
+    } catch (e) {
+        console.error("cluster: FAILED");
+        console.error(e);
+        process.exitCode = 1;
+    } finally {
+        server?.close();
+        await stopWorkers();
+        process.exit();
+    }
+})();
@@ -0,0 +1,127 @@
+// مقایسه‌ی تصادفی LeaderboardIndex با یک آرایه‌ی مرتب ساده.
+// هر خطا در نگه‌داری span ها در _insert/_delete به صورت rank یا range اشتباه دیده می‌شود.
+// اجرا: node test/leaderboard.js [seed]   (با همان seed همان دنباله‌ی عملیات تکرار می‌شود)
+const assert = require("assert");
+const { LeaderboardIndex } = require("../leaderboard.js");
+
+const SEED = Number(process.argv[2]) || Date.now() % 4294967296;
+const ROUNDS = 20;
+const OPS_PER_ROUND = 3000;
+const KEYS = 300;
+
+// mulberry32؛ Math.random هم جایگزین می‌شود تا سطح گره‌های skip list قابل تکرار باشد
+function createRandom(seed) {
+    let state = seed >>> 0;
+    return () => {
+        state = (state + 0x6d2b79f5) | 0;
+        let t = Math.imul(state ^ (state >>> 15), 1 | state);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+const rand = createRandom(SEED);
+Math.random = rand;
+const randInt = (n) => Math.floor(rand() * n);
+
+// مرجع: key -> { score, seq, data } با همان قاعده‌ی ترتیب leaderboard.js
+class Reference {
+    constructor() {
+        this.entries = new Map();
+        this.seq = 0;
+    }
+
+    update(key, score, data) {
+        const entry = this.entries.get(key);
+        if (entry) {
+            if (data !== undefined) entry.data = data;
+            if (score <= entry.score) return false;
+            this.entries.set(key, { score, seq: this.seq++, data: entry.data });
+            return true;
+        }
+        this.entries.set(key, { score, seq: this.seq++, data });
+        return true;
+    }
+
+    remove(key) {
+        return this.entries.delete(key);
+    }
+
+    sorted() {
+        return [...this.entries]
+            .map(([key, entry]) => ({ key, ...entry }))
+            .sort((a, b) => b.score - a.score || a.seq - b.seq);
+    }
+}
+
+function check(index, reference) {
+    const sorted = reference.sorted();
+    assert.strictEqual(index.size, sorted.length, "size");
+
+    sorted.forEach((entry, i) => {
+        assert.strictEqual(index.rank(entry.key), i + 1, `rank of ${entry.key}`);
+        assert.strictEqual(index.scoreOf(entry.key), entry.score, `score of ${entry.key}`);
+    });
+
+    const expected = (offset, limit) =>
+        sorted.slice(offset, offset + limit).map((entry, i) => ({
+            key: entry.key,
+            score: entry.score,
+            rank: offset + i + 1,
+            data: entry.data,
+        }));
+
+    assert.deepStrictEqual(index.range(0, sorted.length + 5), expected(0, sorted.length + 5), "full range");
+    for (let k = 0; k < 20; k++) {
+        const offset = randInt(sorted.length + 3);
+        const limit = randInt(15);
+        assert.deepStrictEqual(index.range(offset, limit), expected(offset, limit), `range(${offset}, ${limit})`);
+    }
+}
+
+function run() {
+    const index = new LeaderboardIndex();
+    const reference = new Reference();
+
+    for (let round = 0; round < ROUNDS; round++) {
+        for (let op = 0; op < OPS_PER_ROUND; op++) {
+            const key = `u${randInt(KEYS)}`;
+            const choice = rand();
+            if (choice < 0.75) {
+                // امتیازهای کم و تکراری تا حالت امتیاز برابر زیاد پیش بیاید
+                const score = randInt(40);
+                const data = rand() < 0.9 ? { name: `${key}-${op}` } : undefined;
+                assert.strictEqual(index.update(key, score, data), reference.update(key, score, data), "update result");
+            } else if (choice < 0.95) {
+                assert.strictEqual(index.remove(key), reference.remove(key), "remove result");
+            } else {
+                assert.strictEqual(index.has(key), reference.entries.has(key), "has");
+            }
+        }
+        check(index, reference);
+    }
+
+    // خالی کردن کامل و دوباره پر کردن؛ سطح skip list باید درست پایین بیاید
+    for (const key of [...reference.entries.keys()]) {
+        index.remove(key);
+        reference.remove(key);
+    }
+    assert.strictEqual(index.level, 1, "level after emptying");
+    check(index, reference);
+
+    for (let i = 0; i < 1000; i++) {
+        const key = `v${i}`;
+        index.update(key, i % 7, { i });
+        reference.update(key, i % 7, { i });
+    }
+    check(index, reference);
+}
+
+try {
+    run();
+    console.log(`leaderboard: ok (seed ${SEED})`);
+} catch (e) {
+    console.error(`leaderboard: FAILED with seed ${SEED}`);
+    console.error(e);
+    process.exitCode = 1;
+}
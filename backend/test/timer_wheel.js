@@ -0,0 +1,109 @@
+// بررسی قطعی TimerWheel با ساعت جعلی: advance(now) مستقیم صدا زده می‌شود.
+// مسیرهای عقب رفتن تنبل مهلت، جلو آمدن مهلت (جابه‌جایی خانه)، خانه‌های چنددوره‌ای
+// و جبران گیر کردن حلقه‌ی رویداد (پرش بیش از یک دور) همه پوشش داده می‌شوند.
+// اجرا: node test/timer_wheel.js [seed]
+const assert = require("assert");
+const TimerWheel = require("../timer_wheel.js");
+
+const SEED = Number(process.argv[2]) || Date.now() % 4294967296;
+const TICK = 100;
+const SLOTS = 16;
+const STEPS = 20000;
+const IDS = 500;
+
+function createRandom(seed) {
+    let state = seed >>> 0;
+    return () => {
+        state = (state + 0x6d2b79f5) | 0;
+        let t = Math.imul(state ^ (state >>> 15), 1 | state);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+const rand = createRandom(SEED);
+const randInt = (min, max) => min + Math.floor(rand() * (max - min + 1));
+
+function run() {
+    let now = 1700000000000;
+    let previous = now; // زمان advance قبلی
+    const fired = [];
+
+    const wheel = new TimerWheel({
+        tickMs: TICK,
+        slots: SLOTS,
+        onExpire: (id, deadline) => fired.push({ id, deadline }),
+    });
+    wheel.currentTick = Math.floor(now / TICK); // ساعت جعلی به جای Date.now
+
+    const pending = new Map(); // id -> آخرین مهلت ثبت‌شده
+    let expired = 0;
+
+    for (let step = 0; step < STEPS; step++) {
+        // چند ثبت، جابه‌جایی یا لغو بین دو advance؛ مهلت‌ها همیشه بعد از now هستند
+        for (let k = randInt(0, 4); k > 0; k--) {
+            const id = randInt(0, IDS - 1);
+            const choice = rand();
+            if (choice < 0.1) {
+                assert.strictEqual(wheel.cancel(id), pending.delete(id), "cancel result");
+                continue;
+            }
+
+            let deadline;
+            if (choice < 0.4 && pending.has(id)) {
+                deadline = pending.get(id) + randInt(1, 20 * TICK); // عقب رفتن (تنبل)
+            } else if (choice < 0.6 && pending.has(id)) {
+                deadline = Math.max(now + 1, pending.get(id) - randInt(1, 20 * TICK)); // جلو آمدن
+            } else {
+                deadline = now + randInt(1, 5 * SLOTS * TICK); // تا پنج دور جلوتر
+            }
+            wheel.schedule(id, deadline);
+            pending.set(id, deadline);
+        }
+
+        // معمولاً کمتر از یک tick؛ گاهی گیر کردن طولانی‌تر از یک دور کامل
+        const stalled = rand() < 0.002;
+        now += stalled ? randInt(SLOTS * TICK, 3 * SLOTS * TICK) : randInt(1, TICK);
+
+        fired.length = 0;
+        wheel.advance(now);
+        const tick = Math.floor(now / TICK);
+
+        for (const { id, deadline } of fired) {
+            assert.ok(pending.has(id), `${id} fired but was not pending`);
+            assert.strictEqual(deadline, pending.get(id), `${id} fired with a stale deadline`);
+            assert.ok(deadline <= now, `${id} fired ${deadline - now}ms early`);
+            // وقتی advance هر tick صدا زده شود، حداکثر یک tick دیر
+            // (مهلتی که تنبل عقب رفته ممکن است زودتر از مرز tick خودش اجرا شود، ولی نه قبل از مهلت)
+            if (now - previous <= TICK) {
+                assert.ok(tick <= Math.ceil(deadline / TICK), `${id} fired more than one tick late`);
+                assert.ok(now - deadline < 2 * TICK, `${id} fired ${now - deadline}ms late`);
+            }
+            pending.delete(id);
+            expired += 1;
+        }
+
+        // هیچ مهلتی که tick آن رسیده نباید جا بماند
+        for (const [id, deadline] of pending) {
+            assert.ok(Math.ceil(deadline / TICK) > tick, `${id} missed (deadline ${deadline}, now ${now})`);
+        }
+        assert.strictEqual(wheel.size, pending.size, "size");
+        previous = now;
+    }
+
+    // بقیه‌ی مهلت‌ها با یک پرش بزرگ همه باید منقضی شوند
+    fired.length = 0;
+    wheel.advance(now + 10 * SLOTS * TICK);
+    assert.strictEqual(fired.length, pending.size, "drain after long stall");
+    assert.strictEqual(wheel.size, 0, "empty wheel");
+    return expired + fired.length;
+}
+
+try {
+    const expired = run();
+    console.log(`timer_wheel: ok, ${expired} expiries (seed ${SEED})`);
+} catch (e) {
+    console.error(`timer_wheel: FAILED with seed ${SEED}`);
+    console.error(e);
+    process.exitCode = 1;
+}
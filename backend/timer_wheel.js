@@ -0,0 +1,117 @@
+// چرخ زمان‌سنج هش‌شده: به جای یک setTimeout برای هر بازیکن،
+// همه‌ی مهلت‌ها در چند خانه نگه داشته می‌شوند و یک interval مشترک آن‌ها را جلو می‌برد.
+class TimerWheel {
+    constructor({ tickMs = 1000, slots = 64, onExpire = () => {} } = {}) {
+        this.tickMs = tickMs;
+        this.slots = Array.from({ length: slots }, () => []);
+        this.entries = new Map(); // id -> { id, deadline, tick, slot, pos }
+        this.onExpire = onExpire;
+        this.currentTick = Math.floor(Date.now() / tickMs);
+        this.interval = null;
+    }
+
+    get size() {
+        return this.entries.size;
+    }
+
+    start() {
+        if (this.interval) return;
+        this.currentTick = Math.floor(Date.now() / this.tickMs);
+        this.interval = setInterval(() => this.advance(), this.tickMs);
+        this.interval.unref?.();
+    }
+
+    stop() {
+        clearInterval(this.interval);
+        this.interval = null;
+    }
+
+    // ثبت یا جابه‌جایی مهلت؛ عقب رفتن مهلت تنبل است و هنگام رسیدن خانه دوباره جا داده می‌شود
+    schedule(id, deadline) {
+        const tick = Math.max(
+            Math.ceil(deadline / this.tickMs),
+            this.currentTick + 1
+        );
+        const entry = this.entries.get(id);
+
+        if (entry) {
+            entry.deadline = deadline;
+            if (tick >= entry.tick) return;
+            this._unlink(entry);
+            entry.tick = tick;
+            this._link(entry);
+            return;
+        }
+
+        const created = { id, deadline, tick, slot: 0, pos: 0 };
+        this.entries.set(id, created);
+        this._link(created);
+    }
+
+    cancel(id) {
+        const entry = this.entries.get(id);
+        if (!entry) return false;
+        this._unlink(entry);
+        this.entries.delete(id);
+        return true;
+    }
+
+    advance(now = Date.now()) {
+        const target = Math.floor(now / this.tickMs);
+
+        // اگر حلقه‌ی رویداد مدت زیادی گیر کرده باشد، بیش از یک دور کامل لازم نیست
+        if (target - this.currentTick > this.slots.length) {
+            this.currentTick = target - this.slots.length;
+        }
+
+        while (this.currentTick < target) {
+            this.currentTick += 1;
+            this._fire(this.currentTick, now);
+        }
+    }
+
+    _fire(tick, now) {
+        const bucket = this.slots[tick % this.slots.length];
+        let i = 0;
+
+        while (i < bucket.length) {
+            const entry = bucket[i];
+            if (entry.tick > tick) {
+                i += 1; // متعلق به دورهای بعدی
+                continue;
+            }
+
+            this._unlink(entry);
+
+            if (entry.deadline > now) {
+                entry.tick = Math.max(
+                    Math.ceil(entry.deadline / this.tickMs),
+                    tick + 1
+                );
+                this._link(entry);
+                continue;
+            }
+
+            this.entries.delete(entry.id);
+            this.onExpire(entry.id, entry.deadline);
+        }
+    }
+
+    _link(entry) {
+        const bucket = this.slots[entry.tick % this.slots.length];
+        entry.slot = entry.tick % this.slots.length;
+        entry.pos = bucket.length;
+        bucket.push(entry);
+    }
+
+    _unlink(entry) {
+        const bucket = this.slots[entry.slot];
+        const last = bucket.pop();
+        if (last !== entry) {
+            bucket[entry.pos] = last;
+            last.pos = entry.pos;
+        }
+    }
+}
+
+module.exports = TimerWheel;
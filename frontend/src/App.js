@@ -7,6 +7,17 @@ import Leaderboard from "./components/Leaderboard";
 // ثابت‌های برنامه
 const ROUND_TIME = 40;
 const API_BASE = '/api';
+// تعداد پاسخ‌هایی که با هم به سرور فرستاده می‌شوند
+const ANSWER_BATCH = 3;
+// پاسخی که منتظر دسته مانده حداکثر این مدت نگه داشته می‌شود
+const IDLE_FLUSH_MS = 1000;
+// سرور مهلت را هنگام رسیدن دسته چک می‌کند؛ اگر زمان باقی‌مانده (با فرض غلط بودن
+// همه‌ی پاسخ‌های در انتظار، هر کدام ۱۰ ثانیه جریمه) کمتر از این باشد، فوراً ارسال کن
+const URGENT_FLUSH_SECONDS = 5;
+const WRONG_PENALTY_SECONDS = 10;
+// تلاش دوباره بعد از خطای شبکه: از ۱ ثانیه، هر بار دو برابر تا ۸ ثانیه
+const RETRY_MIN_MS = 1000;
+const RETRY_MAX_MS = 8000;
 
 function App() {
   // State مدیریت
@@ -31,6 +42,29 @@ function App() {
   const timerId = useRef(null);
   const abortControllerRef = useRef(null);
 
+  // Refs برای صف مسئله‌های از پیش دریافت‌شده و پاسخ‌های ارسال‌نشده
+  const currentRef = useRef(null); // { seq, commitment } مسئله‌ی در حال نمایش
+  const shownSeqRef = useRef(-1); // آخرین مسئله‌ای که نشان داده شده
+  const queueRef = useRef([]);
+  const pendingRef = useRef([]);
+  const flushingRef = useRef(false);
+  const idleFlushRef = useRef(null);
+  const retryDelayRef = useRef(RETRY_MIN_MS);
+  const scoreRef = useRef(0); // آخرین امتیازی که سرور گزارش داده
+  const timeLeftRef = useRef(ROUND_TIME);
+
+  // تایمر و timeout از طریق ref صدا زده می‌شوند تا callbackهای memo شده نسخه‌ی قدیمی آن‌ها را نگه ندارند
+  const startTimerRef = useRef(null);
+  const timeoutRef = useRef(null);
+  const flushRef = useRef(null);
+
+  const resetQueue = useCallback((data) => {
+    currentRef.current = { seq: data.problem_seq, commitment: data.commitment };
+    shownSeqRef.current = data.problem_seq;
+    queueRef.current = data.queue || [];
+    setProblem(data.problem);
+  }, []);
+
   // پاک‌سازی تایمرها و درخواست‌ها
   const clearResources = useCallback(() => {
     if (timerId.current) clearInterval(timerId.current);
@@ -40,15 +74,38 @@ function App() {
     abortControllerRef.current = null;
   }, []);
 
+  const cancelIdleFlush = useCallback(() => {
+    if (idleFlushRef.current) clearTimeout(idleFlushRef.current);
+    idleFlushRef.current = null;
+  }, []);
+
+  const scheduleIdleFlush = useCallback((delay = IDLE_FLUSH_MS) => {
+    if (idleFlushRef.current) return;
+    idleFlushRef.current = setTimeout(() => {
+      idleFlushRef.current = null;
+      flushRef.current();
+    }, delay);
+  }, []);
+
+  // اگر نگه داشتن پاسخ‌ها ممکن است به مهلت سرور برسد، نباید منتظر دسته ماند
+  const answersAreUrgent = useCallback(() => (
+    timeLeftRef.current - WRONG_PENALTY_SECONDS * pendingRef.current.length
+      <= URGENT_FLUSH_SECONDS
+  ), []);
+
   // مدیریت پایان بازی
   const handleGameOver = useCallback((finalScore) => {
     clearResources();
+    cancelIdleFlush();
+    currentRef.current = null;
+    queueRef.current = [];
+    pendingRef.current = [];
     setProblem(null);
     setFinalScore(finalScore);
     setView("board");
     setLeaderboardKey(Date.now());
     setGameActive(false);
-  }, [clearResources]);
+  }, [clearResources, cancelIdleFlush]);
 
   // تابع احراز هویت کاربر
   const authenticateUser = useCallback(async () => {
@@ -104,13 +161,13 @@ function App() {
     }
   }, []);
 
-  // ارسال پاسخ به سرور
-  const submitAnswer = useCallback(async (answer) => {
-    if (!problem || loading || !token) return;
-    
+  // ارسال دسته‌ای پاسخ‌ها؛ امتیاز و زمان همیشه از پاسخ سرور خوانده می‌شوند
+  const sendAnswers = useCallback(async () => {
+    const batch = pendingRef.current.splice(0, pendingRef.current.length);
+
     try {
-      setLoading(true);
       setError(null);
+      if (!currentRef.current) setLoading(true);
       abortControllerRef.current = new AbortController();
 
       const response = await fetch(`${API_BASE}/answer`, {
@@ -119,7 +176,7 @@ function App() {
           "Content-Type": "application/json",
           "Authorization": `Bearer ${token}`
         },
-        body: JSON.stringify({ answer: Boolean(answer) }),
+        body: JSON.stringify({ answers: batch }),
         signal: abortControllerRef.current.signal
       });
 
@@ -130,51 +187,157 @@ function App() {
 
       const data = await response.json();
 
-      if (data.status === "continue") {
-        setProblem(data.problem);
-        setScore(data.score);
-        startLocalTimer(data.time_left);
-      } else {
+      if (data.status === "game_over") {
         handleGameOver(data.final_score);
+        return false;
+      }
+      if (data.status !== "continue") {
+        throw new Error(data.message || "Failed to submit answer");
+      }
+
+      scoreRef.current = data.score;
+      setScore(data.score);
+      startTimerRef.current(data.time_left);
+
+      if (data.rejected !== null && data.rejected !== undefined) {
+        // صف کلاینت با سرور هماهنگ نیست؛ از مسئله‌ی فعلی سرور ادامه بده
+        pendingRef.current = [];
+        resetQueue(data);
+        return true;
+      }
+
+      const known = [
+        { seq: data.problem_seq, problem: data.problem, commitment: data.commitment },
+        ...(data.queue || []),
+      ];
+      const upcoming = known.filter((p) => p.seq > shownSeqRef.current);
+
+      if (!currentRef.current && upcoming.length > 0) {
+        const next = upcoming.shift();
+        currentRef.current = { seq: next.seq, commitment: next.commitment };
+        shownSeqRef.current = next.seq;
+        setProblem(next.problem);
       }
+      queueRef.current = upcoming;
+      return true;
     } catch (err) {
       if (err.name !== 'AbortError') {
         console.error("Answer error:", err);
         setError(err.message || "Failed to submit answer");
+        pendingRef.current.unshift(...batch);
         
         // اگر خطای احراز هویت بود، به صفحه لاگین برگرد
         if (err.message.includes("token") || err.message.includes("Unauthorized")) {
+          pendingRef.current = []; // تلاش دوباره با همین توکن فایده‌ای ندارد
           setIsAuthenticated(false);
           setView("auth");
         }
       }
+      return false;
     } finally {
       if (!abortControllerRef.current?.signal.aborted) {
         setLoading(false);
       }
     }
-  }, [problem, loading, handleGameOver, token]);
+  }, [handleGameOver, resetQueue, token]);
+
+  // فقط یک درخواست در جریان است؛ پاسخ‌هایی که در این فاصله جمع شده‌اند بعد از آن فرستاده می‌شوند
+  const flushAnswers = useCallback(async () => {
+    if (flushingRef.current || !token) return;
+    flushingRef.current = true;
+    cancelIdleFlush();
+
+    let ok = true;
+    try {
+      while (ok && pendingRef.current.length > 0) {
+        ok = await sendAnswers();
+        const blocked = !currentRef.current;
+        if (pendingRef.current.length < ANSWER_BATCH && !blocked && !answersAreUrgent()) break;
+      }
+    } finally {
+      flushingRef.current = false;
+    }
+
+    if (pendingRef.current.length === 0) return;
+    if (!ok) {
+      // ارسال ناموفق بود؛ حتی وقتی مسئله‌ای روی صفحه نیست (currentRef خالی) دوباره تلاش کن
+      scheduleIdleFlush(retryDelayRef.current);
+      retryDelayRef.current = Math.min(retryDelayRef.current * 2, RETRY_MAX_MS);
+    } else {
+      // پاسخ‌هایی که حین ارسال جمع شده‌اند هم بیشتر از IDLE_FLUSH_MS نمی‌مانند
+      retryDelayRef.current = RETRY_MIN_MS;
+      scheduleIdleFlush();
+    }
+  }, [sendAnswers, token, cancelIdleFlush, scheduleIdleFlush, answersAreUrgent]);
+  flushRef.current = flushAnswers;
+
+  // ثبت پاسخ و نمایش فوری مسئله‌ی بعدی از صف
+  const submitAnswer = useCallback(async (answer, flushNow = false) => {
+    if (!token || !currentRef.current) return;
+
+    pendingRef.current.push({ ...currentRef.current, answer: Boolean(answer) });
+
+    const next = queueRef.current.shift();
+    if (next) {
+      currentRef.current = { seq: next.seq, commitment: next.commitment };
+      shownSeqRef.current = next.seq;
+      setProblem(next.problem);
+    } else {
+      currentRef.current = null; // منتظر مسئله‌های جدید از سرور
+      setLoading(true);
+    }
+
+    if (
+      flushNow ||
+      !next ||
+      pendingRef.current.length >= ANSWER_BATCH ||
+      answersAreUrgent()
+    ) {
+      await flushAnswers();
+    } else {
+      scheduleIdleFlush();
+    }
+  }, [token, flushAnswers, scheduleIdleFlush, answersAreUrgent]);
 
   // مدیریت زمان تمام شده
   const handleTimeout = useCallback(async () => {
-    await submitAnswer(false);
-  }, [submitAnswer]);
+    if (currentRef.current) {
+      await submitAnswer(false, true);
+    } else if (pendingRef.current.length > 0) {
+      // منتظر جواب سرور هستیم؛ پاسخ‌های مانده بدون صبر برای backoff فرستاده می‌شوند
+      if (flushingRef.current) return;
+      cancelIdleFlush();
+      await flushAnswers();
+      // زمان تمام شده و سرور هم در دسترس نیست؛ بازی با آخرین امتیاز تأییدشده تمام می‌شود
+      if (pendingRef.current.length > 0 && !flushingRef.current) {
+        handleGameOver(scoreRef.current);
+      }
+    } else if (!flushingRef.current) {
+      // چیزی برای ارسال نیست و مهلت سرور هم گذشته است
+      handleGameOver(scoreRef.current);
+    }
+  }, [submitAnswer, flushAnswers, cancelIdleFlush, handleGameOver]);
+  timeoutRef.current = handleTimeout;
 
   // شروع تایمر محلی
   const startLocalTimer = useCallback((initialTime) => {
     clearResources();
+    timeLeftRef.current = initialTime;
     setTimeLeft(initialTime);
 
     timerId.current = setInterval(() => {
       setTimeLeft(prev => {
         if (prev <= 1) {
-          handleTimeout();
+          timeLeftRef.current = 0;
+          timeoutRef.current();
           return 0;
         }
+        timeLeftRef.current = prev - 1;
         return prev - 1;
       });
     }, 1000);
-  }, [clearResources, handleTimeout]);
+  }, [clearResources]);
+  startTimerRef.current = startLocalTimer;
 
   // شروع بازی جدید
   const startGame = useCallback(async () => {
@@ -216,8 +379,12 @@ function App() {
         throw new Error(data?.message || "Invalid server response");
       }
 
-      setProblem(data.problem);
+      pendingRef.current = [];
+      cancelIdleFlush();
+      retryDelayRef.current = RETRY_MIN_MS;
+      resetQueue(data);
       startLocalTimer(data.time_left ?? ROUND_TIME);
+      scoreRef.current = data.score ?? 0;
       setScore(data.score ?? 0);
 
     } catch (err) {
@@ -247,7 +414,7 @@ function App() {
         setLoading(false);
       }
     }
-  }, [startLocalTimer, isAuthenticated, token]);
+  }, [startLocalTimer, resetQueue, cancelIdleFlush, isAuthenticated, token]);
 
   // Effects مدیریت
   useEffect(() => {
@@ -263,8 +430,11 @@ function App() {
     };
 
     initAuth();
-    return () => clearResources();
-  }, [authenticateUser, clearResources, token, userData]);
+    return () => {
+      clearResources();
+      cancelIdleFlush();
+    };
+  }, [authenticateUser, clearResources, cancelIdleFlush, token, userData]);
 
   useEffect(() => {
     if (error) {